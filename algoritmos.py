@@ -4,73 +4,514 @@ import pandas as pd
 import numpy as np
 from haversine import haversine, Unit
 import time
+import hashlib
+import multiprocessing as mp
+import os
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Mapping
 import sys # Mantido por precaução, embora o setrecursionlimit tenha sido removido
 
 # --- Configurações Globais ---
 # CORREÇÃO 1: Mudei 25 para 25.0 para evitar erro de tipo no Streamlit
 AVG_SPEED_KMH = 25.0  # Velocidade média estimada para deslocamento em Curitiba
 CSV_FILE = 'TurismoCWB(1).csv'
+SHARED_BOUND_CHECK_INTERVAL = 256  # Expansões entre leituras do limite compartilhado (portfólio)
+DOMINANCE_TABLE_SIZE = 200_000  # Máximo de entradas (visitados, último nó) na tabela de dominância do B&B
+NEIGHBOR_LIST_SIZE = 8  # Vizinhos mais próximos considerados pelas heurísticas e pela busca local
+INGEST_CHUNK_SIZE = 100_000  # Linhas lidas por vez do CSV na carga em streaming
+DEDUP_RADIUS_M = 25.0  # Mesmo nome a menos desta distância = mesmo ponto vindo de outra fonte
+DAY_START_MIN = 8 * 60  # Horário de saída (min) usado na checagem das janelas de funcionamento
 
 # --- Variáveis Globais para o B&B (Spec 3.2) ---
-# (Nenhuma alteração nesta classe)
 class BnBStats:
     def __init__(self):
-        self.upper_bound = float('inf')
-        self.best_path = []
-        self.nodes_expanded = 0
-        self.pruning_count = 0
-        self.start_time = 0
-        self.end_time = 0
+        self.reset()
 
     def reset(self):
         self.upper_bound = float('inf')
         self.best_path = []
         self.nodes_expanded = 0
         self.pruning_count = 0
+        self.dominance_lookups = 0
+        self.dominance_hits = 0
+        self.dominance_evictions = 0
+        self.symmetry_pruned = 0
+        self.incumbent_updates = 0
+        self.first_incumbent_time = None
+        self.best_incumbent_time = None
         self.start_time = 0
         self.end_time = 0
 
+    def record_incumbent(self):
+        """Registra quando o B&B melhorou a solução incumbente."""
+        elapsed = time.time() - self.start_time
+        self.incumbent_updates += 1
+        if self.first_incumbent_time is None:
+            self.first_incumbent_time = elapsed
+        self.best_incumbent_time = elapsed
+
     def get_results(self):
         return {
             "cost": self.upper_bound,
             "path": self.best_path,
             "nodes": self.nodes_expanded,
             "pruned": self.pruning_count,
+            "dominance_hits": self.dominance_hits,
+            "dominance_hit_rate": self.dominance_hits / self.dominance_lookups if self.dominance_lookups else 0.0,
+            "dominance_evictions": self.dominance_evictions,
+            "symmetry_pruned": self.symmetry_pruned,
+            "incumbent_updates": self.incumbent_updates,
+            "time_to_first_incumbent": self.first_incumbent_time,
+            "time_to_best": self.best_incumbent_time,
             "time": self.end_time - self.start_time
         }
 
+# =============================================================================
+# ARMAZENAMENTO COLUNAR DOS PONTOS TURÍSTICOS
+# =============================================================================
+# Em vez de um dicionário Python por ponto (df.to_dict('records')), cada
+# atributo vira um array NumPy. Colunas de texto com poucos valores distintos
+# (categoria, acessibilidade, ...) são guardadas como códigos inteiros e o
+# texto livre (nome) como bytes UTF-8.
+# Texto ausente (None/NaN) é gravado como b'' e marcado em uma máscara à
+# parte, para voltar como None (e não como o texto "nan").
+# Onde o código ainda precisa de acesso "por registro" (node['nome']), usamos
+# POIRow: uma visão leve (__slots__) de uma linha do armazenamento.
+
+def _encode_text(values):
+    """
+    Texto -> array UTF-8 ('S') e máscara dos valores ausentes (None/NaN),
+    gravados como b''. A máscara é None quando não falta nenhum valor.
+    """
+    values = np.asarray(values, dtype=object)
+    missing = pd.isna(values)
+    encoded = np.array([b'' if is_missing else str(value).encode('utf-8')
+                        for value, is_missing in zip(values.tolist(), missing.tolist())], dtype='S')
+    return encoded, (missing if missing.any() else None)
+
+class POIRow(Mapping):
+    """Visão somente leitura de uma linha do POIStore, acessada como dict."""
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._store.value(key, self._row)
+
+    def __iter__(self):
+        return iter(self._store.columns)
+
+    def __len__(self):
+        return len(self._store.columns)
+
+    def __repr__(self):
+        return f"POIRow({self.to_dict()!r})"
+
+    @property
+    def row(self):
+        return self._row
+
+    def to_dict(self):
+        return {key: self[key] for key in self._store.columns}
+
+    def __reduce__(self):
+        # Ao enviar para outro processo, manda só os valores da linha (dict),
+        # e não o armazenamento inteiro.
+        return (dict, (self.to_dict(),))
+
+class POIStore:
+    """
+    Armazenamento colunar dos pontos turísticos: um array NumPy por
+    atributo, mais os índices ID -> linha e nome -> linha.
+    'missing' (opcional) traz as máscaras de ausentes das colunas que já
+    chegam em UTF-8 (ver '_encode_text').
+    """
+    # Colunas de texto com até esta fração de valores distintos viram códigos
+    CATEGORICAL_MAX_RATIO = 0.5
+
+    def __init__(self, columns, missing=None):
+        self.columns = list(columns)
+        self._data = {}
+        self._categories = {}
+        self._encoded = set()
+        self._missing = {}
+        for key, raw_values in columns.items():
+            values = np.asarray(raw_values)
+            if values.dtype.kind in 'biuf':
+                self._data[key] = values
+                continue
+            if values.dtype.kind == 'S':
+                mask = (missing or {}).get(key)
+            else:
+                # Texto em UTF-8 (1 byte por caractere ASCII, não 4); a ordem
+                # dos bytes UTF-8 é a mesma dos caracteres. Codifica a entrada
+                # original: np.asarray de uma lista já teria virado NaN em "nan"
+                values, mask = _encode_text(raw_values)
+            if mask is not None and mask.any():
+                self._missing[key] = np.asarray(mask, dtype=bool)
+            categories, codes = np.unique(values, return_inverse=True)
+            if len(categories) <= max(1, self.CATEGORICAL_MAX_RATIO * len(values)):
+                self._categories[key] = np.array([value.decode('utf-8') for value in categories.tolist()], dtype=str)
+                self._data[key] = codes.astype(np.int32)
+            else:
+                self._data[key] = values
+                self._encoded.add(key)
+        self.ids = self._data['id']
+        self.id_to_row = {int(node_id): row for row, node_id in enumerate(self.ids)}
+        if 'nome' in self._encoded:
+            # Decodifica nome a nome (sem materializar a coluna inteira em UTF-32)
+            self.name_to_row = {name.decode('utf-8'): row for row, name in enumerate(self._data['nome'].tolist())}
+        else:
+            self.name_to_row = {str(name): row for row, name in enumerate(self.column('nome'))}
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls({key: df[key].to_numpy() for key in df.columns})
+
+    @classmethod
+    def from_records(cls, records):
+        keys = list(records[0].keys()) if records else []
+        return cls({key: [record[key] for record in records] for key in keys})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, key):
+        """Coluna completa já decodificada (categorias voltam a ser texto, ausentes = None)."""
+        if key in self._categories:
+            values = self._categories[key][self._data[key]]
+        elif key in self._encoded:
+            values = np.char.decode(self._data[key], 'utf-8')
+        else:
+            return self._data[key]
+        if key in self._missing:
+            values = values.astype(object)
+            values[self._missing[key]] = None
+        return values
+
+    def value(self, key, row):
+        """Valor de uma célula como escalar Python (como em to_dict('records'))."""
+        if key in self._categories:
+            if key in self._missing and self._missing[key][row]:
+                return None
+            return str(self._categories[key][self._data[key][row]])
+        if key in self._encoded:
+            if key in self._missing and self._missing[key][row]:
+                return None
+            return self._data[key][row].decode('utf-8')
+        return self._data[key][row].item()
+
+    def row(self, row):
+        return POIRow(self, row)
+
+    def rows(self, indices=None):
+        """Visões das linhas 'indices' (todas, se None)."""
+        if indices is None:
+            indices = range(len(self))
+        return [POIRow(self, int(row)) for row in indices]
+
+    def row_for_id(self, node_id):
+        row = self.id_to_row.get(node_id)
+        return None if row is None else POIRow(self, row)
+
+    def indices_for_ids(self, node_ids):
+        """Linhas dos IDs informados, em O(k). IDs desconhecidos são ignorados."""
+        return [self.id_to_row[node_id] for node_id in node_ids if node_id in self.id_to_row]
+
+    def indices_for_names(self, names):
+        """Linhas dos nomes informados, em O(k), na ordem do catálogo."""
+        return sorted(self.name_to_row[name] for name in names if name in self.name_to_row)
+
+    def to_frame(self, indices=None):
+        """DataFrame com as linhas 'indices' (ex.: para st.map)."""
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+        return pd.DataFrame({key: self.column(key)[indices] for key in self.columns})
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays (sem contar os índices em dict)."""
+        return sum(values.nbytes for values in self._data.values()) + sum(
+            categories.nbytes for categories in self._categories.values()) + sum(
+            mask.nbytes for mask in self._missing.values())
+
+# =============================================================================
+# CARGA EM STREAMING (VÁRIOS CSVs, EM BLOCOS)
+# =============================================================================
+# Os arquivos são lidos em blocos de INGEST_CHUNK_SIZE linhas. Cada bloco é
+# validado e normalizado, e só as linhas novas (ID inédito e que não sejam o
+# mesmo ponto já visto em outra fonte) seguem para as colunas do POIStore.
+# A memória fica limitada a um bloco + os pontos únicos mantidos, qualquer
+# que seja o tamanho da entrada.
+#
+# A mediana de 'tempo_visita_min' só é conhecida no fim: os valores ausentes
+# são preenchidos depois da leitura, com a mediana dos pontos mantidos.
+# Coordenadas quase idênticas só contam como duplicata com o mesmo nome
+# (ex.: "Largo da Ordem" e "Feira do Largo da Ordem" têm o mesmo endereço).
+
+REQUIRED_COLUMNS = ('id', 'nome', 'latitude', 'longitude', 'custo_entrada', 'tempo_visita_min')
+
+def _normalize_name(name):
+    """Nome sem acentos, sem diferença de maiúsculas e com espaços simples."""
+    text = str(name)
+    if not text.isascii():
+        text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+def _in_sorted(values, sorted_values):
+    """Pertinência de 'values' em um array ordenado (busca binária vetorizada)."""
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[pos] == values
+
+def _merge_sorted(sorted_values, new_values, *aligned):
+    """Insere 'new_values' em 'sorted_values' (e nos arrays alinhados) mantendo a ordem."""
+    order = np.argsort(new_values, kind='stable')
+    positions = np.searchsorted(sorted_values, new_values[order])
+    merged = [np.insert(sorted_values, positions, new_values[order])]
+    for old, new in aligned:
+        merged.append(np.insert(old, positions, new[order], axis=0))
+    return merged
+
+class _Deduplicator:
+    """
+    Filtra IDs repetidos e o mesmo ponto (nome + coordenadas) de outra fonte.
+    O estado entre blocos são arrays ordenados (~32 bytes por ponto mantido):
+    os IDs vistos e, para a checagem de proximidade, a chave hash(nome, célula)
+    de cada ponto com suas coordenadas. As células da grade têm o lado igual
+    ao raio, então um ponto próximo só pode estar nas 9 células vizinhas.
+    """
+
+    def __init__(self, radius_m=DEDUP_RADIUS_M):
+        self.radius_m = radius_m
+        self.seen_ids = np.empty(0, dtype=np.int64)
+        self.seen_keys = np.empty(0, dtype=np.uint64)
+        self.seen_coords = np.empty((0, 2))
+
+    def _cell_keys(self, names, lats, lons):
+        """Chave da célula de cada ponto e das 9 células vizinhas (shape n x 9)."""
+        codes, uniques = pd.factorize(names)
+        name_hash = pd.util.hash_array(np.array([_normalize_name(name) for name in uniques], dtype=object))[codes]
+        cy = np.floor(lats * 111_320.0 / self.radius_m).astype(np.int64)
+        cx = np.floor(lons * 111_320.0 * np.cos(np.radians(lats)) / self.radius_m).astype(np.int64)
+        offsets = np.array([-1, 0, 1], dtype=np.int64)
+        ny = (cy[:, None, None] + offsets[None, :, None]).view(np.uint64)
+        nx = (cx[:, None, None] + offsets[None, None, :]).view(np.uint64)
+        keys = (name_hash[:, None, None] * np.uint64(0x9E3779B97F4A7C15)
+                ^ ny * np.uint64(0xC2B2AE3D27D4EB4F) ^ nx * np.uint64(0x165667B19E3779F9))
+        keys = keys.reshape(len(lats), 9)
+        return keys[:, 4], keys
+
+    def _near_seen(self, keys, lat, lon):
+        """Há ponto de blocos anteriores com a mesma chave de vizinhança a menos do raio?"""
+        for key in keys:
+            lo = np.searchsorted(self.seen_keys, key, side='left')
+            hi = np.searchsorted(self.seen_keys, key, side='right')
+            for other in self.seen_coords[lo:hi]:
+                if haversine((lat, lon), tuple(other), unit=Unit.METERS) <= self.radius_m:
+                    return True
+        return False
+
+    def filter(self, ids, names, lats, lons):
+        """Máscara das linhas a manter e contagem de duplicatas (por ID, por coordenada)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        own, neighbors = self._cell_keys(names, lats, lons)
+
+        # IDs: repetidos no bloco ou já vistos em blocos anteriores
+        keep = ~(pd.Series(ids).duplicated().to_numpy() | _in_sorted(ids, self.seen_ids))
+        duplicate_ids = int(len(ids) - keep.sum())
+
+        # Candidatos a duplicata por coordenada: mesmo nome em célula vizinha
+        hit_seen = _in_sorted(neighbors.ravel(), self.seen_keys).reshape(neighbors.shape).any(axis=1)
+        hit_chunk = (np.isin(np.delete(neighbors, 4, axis=1), own).any(axis=1)
+                     | pd.Series(own).duplicated(keep=False).to_numpy())
+        in_chunk = {}
+        for i in np.nonzero(hit_chunk)[0]:
+            in_chunk.setdefault(own[i], []).append(i)
+
+        duplicate_coords = 0
+        for i in np.nonzero(keep & (hit_seen | hit_chunk))[0]:
+            near = hit_seen[i] and self._near_seen(neighbors[i], lats[i], lons[i])
+            if not near and hit_chunk[i]:
+                # Compara com os pontos anteriores do próprio bloco (o primeiro vence)
+                near = any(
+                    j < i and keep[j] and haversine((lats[i], lons[i]), (lats[j], lons[j]), unit=Unit.METERS) <= self.radius_m
+                    for key in neighbors[i] for j in in_chunk.get(key, ())
+                )
+            if near:
+                keep[i] = False
+                duplicate_coords += 1
+
+        self.seen_ids, = _merge_sorted(self.seen_ids, ids[keep])
+        self.seen_keys, self.seen_coords = _merge_sorted(
+            self.seen_keys, own[keep], (self.seen_coords, np.column_stack((lats[keep], lons[keep]))))
+        return keep, duplicate_ids, duplicate_coords
+
+def _normalize_chunk(chunk):
+    """Spec 1.2 aplicada a um bloco: preenche 'custo_entrada' e descarta linhas inválidas."""
+    chunk = chunk.copy()
+    chunk['custo_entrada'] = chunk['custo_entrada'].fillna(0)
+    valid = (
+        chunk['id'].notna() & chunk['nome'].notna()
+        & chunk['latitude'].between(-90, 90) & chunk['longitude'].between(-180, 180)
+    )
+    return chunk[valid], int((~valid).sum())
+
+def stream_poi_store(csv_files=CSV_FILE, chunksize=INGEST_CHUNK_SIZE, dedup_radius_m=DEDUP_RADIUS_M):
+    """
+    Lê um ou mais CSVs em blocos direto para o armazenamento colunar.
+    As colunas do primeiro arquivo definem o esquema; os demais precisam
+    contê-las (colunas extras são ignoradas).
+    Retorna o POIStore e as estatísticas da carga (linhas lidas, mantidas,
+    inválidas, duplicadas e linhas por segundo).
+    """
+    if isinstance(csv_files, str):
+        csv_files = [csv_files]
+    start_time = time.time()
+    stats = {"files": len(csv_files), "rows_read": 0, "rows_kept": 0, "invalid": 0,
+             "duplicate_ids": 0, "duplicate_coords": 0}
+    dedup = _Deduplicator(dedup_radius_m)
+    schema, parts, text_columns = None, {}, set()
+
+    for csv_file in csv_files:
+        for chunk in pd.read_csv(csv_file, chunksize=chunksize):
+            stats["rows_read"] += len(chunk)
+            if 'Unnamed: 0' in chunk.columns:
+                chunk = chunk.drop(columns=['Unnamed: 0'])
+            if schema is None:
+                schema = list(chunk.columns)
+                missing = [key for key in REQUIRED_COLUMNS if key not in schema]
+                if missing:
+                    raise ValueError(f"Arquivo '{csv_file}' sem as colunas obrigatórias: {missing}")
+            missing = [key for key in schema if key not in chunk.columns]
+            if missing:
+                raise ValueError(f"Arquivo '{csv_file}' sem as colunas: {missing}")
+
+            chunk, invalid = _normalize_chunk(chunk[schema])
+            keep, duplicate_ids, duplicate_coords = dedup.filter(
+                chunk['id'].to_numpy(), chunk['nome'].to_numpy(),
+                chunk['latitude'].to_numpy(), chunk['longitude'].to_numpy())
+            stats["invalid"] += invalid
+            stats["duplicate_ids"] += duplicate_ids
+            stats["duplicate_coords"] += duplicate_coords
+            for key in schema:
+                values, mask = chunk[key].to_numpy()[keep], None
+                if values.dtype.kind not in 'biuf':
+                    # Texto guardado como UTF-8 já no bloco (não como objetos str),
+                    # com a mesma codificação de ausentes do POIStore
+                    values, mask = _encode_text(values)
+                    text_columns.add(key)
+                parts.setdefault(key, []).append((values, mask))
+
+    if schema is None or not sum(len(values) for values, _ in parts['id']):
+        raise ValueError("Nenhum ponto turístico válido nos arquivos informados.")
+
+    # O tipo da coluna vem de todos os blocos: uma coluna de texto vazia em
+    # um bloco inteiro chega dele como float (só NaN) e é codificada aqui
+    columns, missing = {}, {}
+    for key in schema:
+        chunk_parts = parts.pop(key)
+        if key in text_columns:
+            chunk_parts = [part if part[0].dtype.kind == 'S' else _encode_text(part[0]) for part in chunk_parts]
+            missing[key] = np.concatenate([np.zeros(len(values), dtype=bool) if mask is None else mask
+                                           for values, mask in chunk_parts])
+        columns[key] = np.concatenate([values for values, _ in chunk_parts])
+    columns['id'] = columns['id'].astype(np.int64)
+    tempo = columns['tempo_visita_min']
+    if tempo.dtype.kind == 'f' and np.isnan(tempo).any():
+        columns['tempo_visita_min'] = np.where(np.isnan(tempo), np.nanmedian(tempo), tempo)
+
+    store = POIStore(columns, missing)
+    elapsed = time.time() - start_time
+    stats["rows_kept"] = len(store)
+    stats["time"] = elapsed
+    stats["rows_per_sec"] = stats["rows_read"] / elapsed if elapsed > 0 else float('inf')
+    return store, stats
+
 # =============================================================================
 # FUNÇÕES DE DADOS E CÁLCULO
 # =============================================================================
 
-def load_data():
+def load_poi_store(csv_files=CSV_FILE):
     """
-    Carrega, limpa e prepara os dados do CSV.
-    Retorna o DataFrame completo e o mapeamento ID -> Índice.
+    Carrega, limpa e prepara os dados do(s) CSV(s) no armazenamento colunar
+    (leitura em blocos, ver 'stream_poi_store').
+    Retorna o DataFrame, o POIStore e a matriz de distâncias completa.
     """
     try:
-        df = pd.read_csv(CSV_FILE)
-        if 'Unnamed: 0' in df.columns:
-            df = df.drop(columns=['Unnamed: 0'])
-        
-        # Spec 1.2: Limpeza e padronização
-        df['custo_entrada'] = df['custo_entrada'].fillna(0)
-        df['tempo_visita_min'] = df['tempo_visita_min'].fillna(df['tempo_visita_min'].median())
-        
-        all_nodes_data = df.to_dict('records')
-        id_to_index = {node['id']: i for i, node in enumerate(all_nodes_data)}
+        store, _ = stream_poi_store(csv_files)
+        df = store.to_frame()
         
         # Calcular matriz de distância completa
-        dist_matrix_full = calculate_distance_matrix(all_nodes_data)
+        dist_matrix_full = calculate_distance_matrix(store.rows())
 
-        return df, all_nodes_data, id_to_index, dist_matrix_full
+        return df, store, dist_matrix_full
 
-    except FileNotFoundError:
-        print(f"Erro: Arquivo '{CSV_FILE}' não encontrado.")
-        return None, None, None, None
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo '{e.filename}' não encontrado.")
+        return None, None, None
     except Exception as e:
         print(f"Erro ao ler o CSV: {e}")
+        return None, None, None
+
+def load_data():
+    """
+    Carrega, limpa e prepara os dados do CSV.
+    Retorna o DataFrame completo, a lista de pontos (visões POIRow do
+    armazenamento colunar), o mapeamento ID -> Índice e a matriz de distâncias.
+    """
+    df, store, dist_matrix_full = load_poi_store()
+    if df is None:
         return None, None, None, None
+    return df, store.rows(), store.id_to_row, dist_matrix_full
+
+def dataset_fingerprint(csv_file=CSV_FILE, extra=()):
+    """
+    Impressão digital curta (SHA-256) do conteúdo do(s) CSV(s), usada para
+    identificar tabelas pré-calculadas. 'extra' entra no hash (ex.: parâmetros).
+    """
+    csv_files = [csv_file] if isinstance(csv_file, str) else list(csv_file)
+    digest = hashlib.sha256()
+    for path in csv_files:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    digest.update(repr(tuple(extra)).encode())
+    return digest.hexdigest()[:16]
+
+def write_atomic(path, write):
+    """
+    Grava 'path' por meio de um temporário no mesmo diretório + os.replace:
+    quem lê o arquivo vê a versão antiga ou a nova inteira, nunca uma
+    gravação pela metade. 'write' recebe o arquivo temporário (binário).
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def process_context(preload=('algoritmos',)):
+    """
+    Contexto de multiprocessing sem fork, para pools e processos criados a
+    partir do servidor do Streamlit (que tem várias threads): forkserver,
+    com os módulos 'preload' pré-carregados, ou spawn onde ele não existe.
+    """
+    if 'forkserver' in mp.get_all_start_methods():
+        ctx = mp.get_context('forkserver')
+        ctx.set_forkserver_preload(list(preload))
+        return ctx
+    return mp.get_context('spawn')
 
 def calculate_distance_matrix(nodes):
     """
@@ -93,55 +534,218 @@ def calculate_travel_time(dist_km, avg_speed_kmh=AVG_SPEED_KMH):
         return float('inf')
     return (dist_km / avg_speed_kmh) * 60  # Converte horas para minutos
 
+# =============================================================================
+# AVALIAÇÃO EM LOTE DE TOURS
+# =============================================================================
+# Um único kernel NumPy avalia muitos tours de uma vez (busca local,
+# varreduras de sensibilidade, verificação de resultados). Cada linha de
+# 'tours' é um tour em índices da matriz de distâncias, completado com -1
+# quando é mais curto que os demais.
+# As somas usam cumsum (da esquerda para a direita), então a distância é
+# idêntica, bit a bit, à soma das arestas em um laço Python.
+
+def pad_tours(paths, fill=-1):
+    """Lista de caminhos de tamanhos diferentes -> array 2-D completado com 'fill'."""
+    width = max((len(path) for path in paths), default=0)
+    tours = np.full((len(paths), width), fill, dtype=np.int64)
+    for i, path in enumerate(paths):
+        tours[i, :len(path)] = path
+    return tours
+
+def parse_clock_minutes(values):
+    """Horários 'HH:MM' -> minutos desde a meia-noite (NaN se inválido)."""
+    minutes = []
+    for value in values:
+        try:
+            hours, mins = str(value).split(':')[:2]
+            minutes.append(int(hours) * 60 + int(mins))
+        except ValueError:
+            minutes.append(np.nan)
+    return np.array(minutes, dtype=float)
+
+def _window_bound(values, n, missing):
+    """Abertura/fechamento por ponto; horário ausente (None ou NaN) = sem limite."""
+    if values is None:
+        return np.full(n, missing)
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isnan(values), missing, values)
+
+def evaluate_tours(dist_matrix, tours, closed=False, visit_times=None, visit_costs=None,
+                   opening_min=None, closing_min=None, start_time_min=DAY_START_MIN,
+                   avg_speed_kmh=AVG_SPEED_KMH):
+    """
+    Avalia todos os tours de 'tours' (array inteiro 2-D, -1 = posição vazia).
+      * closed=True soma a aresta de volta do último ao primeiro ponto. Um
+        tour já escrito fechado (último == primeiro) não visita a partida
+        de novo no fim.
+      * visit_times / visit_costs / opening_min / closing_min são vetores
+        por ponto (índices da matriz); os ausentes contam como zero/sem janela.
+      * A violação de janela soma, em minutos, a chegada antes da abertura
+        e a saída depois do fechamento, saindo às 'start_time_min' e sem
+        esperas.
+    Retorna um dicionário de arrays (um valor por tour): 'distance' (km),
+    'travel_time', 'visit_time', 'total_time', 'window_violation' (min) e
+    'entry_cost' (R$).
+    """
+    tours = np.atleast_2d(np.asarray(tours, dtype=np.int64))
+    if tours.shape[1] == 0:
+        tours = np.full((len(tours), 1), -1, dtype=np.int64)
+    dist_matrix = np.asarray(dist_matrix, dtype=float)
+    n_tours = len(tours)
+    valid = tours >= 0
+    lengths = valid.sum(axis=1)
+    stops = np.where(valid, tours, 0)
+    rows = np.arange(n_tours)
+
+    # Distâncias: arestas consecutivas válidas (+ volta ao início)
+    legs = np.where(valid[:, 1:], dist_matrix[stops[:, :-1], stops[:, 1:]], 0.0)
+    if closed:
+        last = stops[rows, np.maximum(lengths - 1, 0)]
+        legs = np.column_stack((legs, np.where(lengths > 1, dist_matrix[last, stops[:, 0]], 0.0)))
+    distance = np.cumsum(np.column_stack((np.zeros(n_tours), legs)), axis=1)[:, -1]
+
+    if avg_speed_kmh > 0:
+        travel_time = calculate_travel_time(distance, avg_speed_kmh)
+        leg_times = calculate_travel_time(legs, avg_speed_kmh)
+    else:
+        travel_time = np.full(n_tours, np.inf)
+        leg_times = np.full(legs.shape, np.inf)
+
+    # Pontos visitados: o retorno explícito à partida não é uma nova visita
+    visited = valid.copy()
+    returns = (lengths > 1) & (stops[rows, np.maximum(lengths - 1, 0)] == stops[:, 0])
+    visited[rows[returns], lengths[returns] - 1] = False
+
+    def per_stop(values):
+        if values is None:
+            return np.zeros(tours.shape)
+        return np.where(visited, np.asarray(values, dtype=float)[stops], 0.0)
+
+    visits = per_stop(visit_times)
+    visit_time = np.cumsum(visits, axis=1)[:, -1]
+    entry_cost = np.cumsum(per_stop(visit_costs), axis=1)[:, -1]
+
+    window_violation = np.zeros(n_tours)
+    if opening_min is not None or closing_min is not None:
+        # Chegada em cada posição = saída + viagem até ela + visitas anteriores
+        arrival_travel = np.column_stack((np.zeros(n_tours), np.cumsum(leg_times[:, :tours.shape[1] - 1], axis=1)))
+        arrival_visits = np.column_stack((np.zeros(n_tours), np.cumsum(visits[:, :-1], axis=1)))
+        arrival = start_time_min + arrival_travel + arrival_visits
+        opening = _window_bound(opening_min, len(dist_matrix), -np.inf)
+        closing = _window_bound(closing_min, len(dist_matrix), np.inf)
+        early = np.maximum(opening[stops] - arrival, 0.0)
+        late = np.maximum(arrival + visits - closing[stops], 0.0)
+        window_violation = np.where(visited, early + late, 0.0).sum(axis=1)
+
+    return {
+        "distance": distance,
+        "travel_time": travel_time,
+        "visit_time": visit_time,
+        "total_time": travel_time + visit_time,
+        "entry_cost": entry_cost,
+        "window_violation": window_violation,
+    }
+
 # =============================================================================
 # PARTE 1: ALGORITMO BRANCH AND BOUND PARA TSP (Spec 3.1)
 # =============================================================================
 
-def _calculate_heuristic_upper_bound(dist_matrix):
+def compute_neighbor_lists(dist_matrix):
+    """
+    Listas de vizinhos de cada nó, do mais próximo ao mais distante (sem o
+    próprio nó). Calculadas uma vez com argsort e reutilizadas pela
+    heurística, pela busca local e pela ordem de ramificação do B&B.
+    """
+    n = len(dist_matrix)
+    order = np.argsort(np.asarray(dist_matrix), axis=1, kind='stable')
+    return np.array([row[row != i] for i, row in enumerate(order)], dtype=np.int64).reshape(n, max(n - 1, 0))
+
+def _calculate_heuristic_upper_bound(dist_matrix, neighbor_lists=None):
     """
     Spec 5.1: Heurística Simples (Vizinho Mais Próximo)
+    Percorre só as NEIGHBOR_LIST_SIZE primeiras posições da lista de vizinhos
+    e recorre ao restante da lista apenas se todos eles já foram visitados.
     """
     n = len(dist_matrix)
+    if neighbor_lists is None:
+        neighbor_lists = compute_neighbor_lists(dist_matrix)
     current_node = 0
     path = [current_node]
     visited = {current_node}
-    total_cost = 0
 
     while len(visited) < n:
         last_node = path[-1]
-        nearest_neighbor = -1
-        min_dist = float('inf')
-
-        for neighbor in range(n):
-            if neighbor not in visited:
-                if dist_matrix[last_node][neighbor] < min_dist:
-                    min_dist = dist_matrix[last_node][neighbor]
-                    nearest_neighbor = neighbor
+        candidates = neighbor_lists[last_node]
+        nearest_neighbor = next((int(v) for v in candidates[:NEIGHBOR_LIST_SIZE] if v not in visited), -1)
+        if nearest_neighbor == -1:
+            nearest_neighbor = next((int(v) for v in candidates[NEIGHBOR_LIST_SIZE:] if v not in visited), -1)
         
         if nearest_neighbor != -1:
-            total_cost += min_dist
             path.append(nearest_neighbor)
             visited.add(nearest_neighbor)
         else:
             break
             
-    total_cost += dist_matrix[path[-1]][current_node]
     path.append(current_node)
     
-    return total_cost, path
+    return _path_cost(dist_matrix, path), path
 
-def _solve_tsp_branch_and_bound(dist_matrix, stats):
+def _solve_tsp_branch_and_bound(dist_matrix, stats, shared_bound=None, dominance_table_size=DOMINANCE_TABLE_SIZE,
+                                neighbor_lists=None, completion_bound=False):
     """
     Spec 3.1: Implementação do Algoritmo Branch and Bound
     Recebe um objeto 'stats' para atualizar.
+
+    'shared_bound' (opcional, multiprocessing.Value('d')) é um limite superior
+    compartilhado com outros solvers rodando em paralelo: é lido a cada
+    SHARED_BOUND_CHECK_INTERVAL expansões e recebe as melhorias deste B&B.
+
+    Reduções do espaço de busca:
+      * Dominância: dois caminhos parciais com o mesmo conjunto de visitados e
+        o mesmo último nó têm os mesmos complementos; só o mais barato precisa
+        ser expandido. A tabela (máscara de bits, último nó) -> menor custo é
+        limitada a 'dominance_table_size' entradas (descarta a mais antiga).
+      * Simetria: com matriz simétrica, todo tour aparece nos dois sentidos.
+        Fixamos o sentido exigindo que o nó 1 seja visitado antes do nó 2.
+
+    Ramificação: os filhos são empilhados do vizinho mais distante para o mais
+    próximo, de modo que a pilha (LIFO) mergulhe primeiro na aresta mais
+    barata e encontre boas soluções incumbentes cedo.
+
+    Com completion_bound=True, o limite inferior de um caminho parcial soma
+    ao custo já percorrido o limite clássico das duas arestas mais baratas:
+    cada nó não visitado ainda recebe duas arestas do tour, e o último nó e
+    o ponto de partida recebem uma cada (cada aresta conta para as duas
+    pontas, daí as metades). Só vale a pena quando o incumbente inicial já é
+    bom (reotimização incremental): aí a árvore é podada perto da raiz.
     """
     n = len(dist_matrix)
-    stack = [ ([0], 0) ] 
+    if neighbor_lists is None:
+        neighbor_lists = compute_neighbor_lists(dist_matrix)
+    half_pair, half_end = [0.0] * n, [0.0] * n
+    if completion_bound and n > 1:
+        # Cada aresta pelo seu sentido mais barato: o limite continua válido
+        # com distâncias assimétricas
+        cheapest = np.minimum(np.asarray(dist_matrix, dtype=float), np.transpose(dist_matrix))
+        np.fill_diagonal(cheapest, np.inf)
+        nearest = np.sort(cheapest, axis=1)[:, :2]
+        if n == 2:
+            nearest[:, 1] = nearest[:, 0]
+        half_end = (nearest[:, 0] / 2).tolist()
+        half_pair = (nearest.sum(axis=1) / 2).tolist()
+    stack = [ ([0], 0, 1, sum(half_pair[1:])) ]
+    external_bound = float('inf')
+    dominance = OrderedDict()
+    branch_order = [[int(v) for v in row[::-1]] for row in neighbor_lists]
+    break_symmetry = n >= 3 and np.allclose(dist_matrix, np.transpose(dist_matrix))
 
     while stack:
-        current_path, current_cost = stack.pop()
+        current_path, current_cost, visited_mask, unvisited_bound = stack.pop()
         
         stats.nodes_expanded += 1
+
+        if shared_bound is not None and stats.nodes_expanded % SHARED_BOUND_CHECK_INTERVAL == 0:
+            external_bound = shared_bound.value
         
         if len(current_path) == n:
             cost_to_complete = dist_matrix[current_path[-1]][0]
@@ -150,25 +754,55 @@ def _solve_tsp_branch_and_bound(dist_matrix, stats):
             if final_cost < stats.upper_bound:
                 stats.upper_bound = final_cost
                 stats.best_path = current_path + [0]
+                stats.record_incumbent()
+                if shared_bound is not None:
+                    with shared_bound.get_lock():
+                        shared_bound.value = min(shared_bound.value, final_cost)
             continue
 
         last_node = current_path[-1]
-        for next_node in range(n):
-            if next_node not in current_path:
+        for next_node in branch_order[last_node]:
+            if not visited_mask & (1 << next_node):
+
+                # Simetria: o nó 2 só entra depois do nó 1
+                if break_symmetry and next_node == 2 and not visited_mask & 2:
+                    stats.symmetry_pruned += 1
+                    continue
                 
                 new_path = current_path + [next_node]
                 new_cost = current_cost + dist_matrix[last_node][next_node]
-                lower_bound = new_cost 
+                new_mask = visited_mask | (1 << next_node)
+                child_unvisited = unvisited_bound - half_pair[next_node]
+                lower_bound = new_cost + child_unvisited + half_end[next_node] + half_end[0]
+
+                # O limite externo poda só com folga estrita, para que o
+                # B&B ainda encontre (e devolva) um tour de mesmo custo.
+                if not (lower_bound < stats.upper_bound and lower_bound <= external_bound + 1e-9):
+                    stats.pruning_count += 1
+                    continue
 
-                if lower_bound < stats.upper_bound:
-                    stack.append( (new_path, new_cost) )
-                else:
+                # Dominância: descarta se já vimos (visitados, último) mais barato
+                key = (new_mask, next_node)
+                stats.dominance_lookups += 1
+                seen_cost = dominance.get(key)
+                if seen_cost is not None and seen_cost <= new_cost:
+                    stats.dominance_hits += 1
                     stats.pruning_count += 1
+                    continue
+                dominance[key] = new_cost
+                dominance.move_to_end(key)
+                if len(dominance) > dominance_table_size:
+                    dominance.popitem(last=False)
+                    stats.dominance_evictions += 1
 
-def run_tsp_experiment(experiment_name, nodes_data):
+                stack.append( (new_path, new_cost, new_mask, child_unvisited) )
+
+def run_tsp_experiment(experiment_name, nodes_data, exact=True, shared_bound=None):
     """
     Função wrapper para rodar um experimento TSP B&B.
     Retorna o nome, as métricas e o caminho.
+    Com exact=False, devolve apenas a solução da heurística (sem o B&B),
+    útil para instâncias grandes demais para a busca exata.
     """
     # CORREÇÃO 2: Removida a restrição de "!= 10"
     # Agora aceita qualquer número de nós (desde que >= 2)
@@ -183,34 +817,180 @@ def run_tsp_experiment(experiment_name, nodes_data):
     index_to_name = {i: node['nome'] for i, node in enumerate(nodes_data)}
     dist_matrix = calculate_distance_matrix(nodes_data)
     
+    neighbor_lists = compute_neighbor_lists(dist_matrix)
+    
     stats = BnBStats()
     
     # Calcular Limite Superior Inicial (Heurística)
-    heuristic_cost, heuristic_path = _calculate_heuristic_upper_bound(dist_matrix)
+    heuristic_cost, heuristic_path = _calculate_heuristic_upper_bound(dist_matrix, neighbor_lists)
     stats.upper_bound = heuristic_cost
     stats.best_path = heuristic_path
     
     # Rodar Branch and Bound
     stats.start_time = time.time()
-    _solve_tsp_branch_and_bound(dist_matrix, stats)
+    if exact:
+        _solve_tsp_branch_and_bound(dist_matrix, stats, shared_bound, neighbor_lists=neighbor_lists)
     stats.end_time = time.time()
 
     # Formatar resultados
     results = stats.get_results()
     results['name'] = experiment_name
     results['heuristic_cost'] = heuristic_cost # Inclui o custo da heurística
+    results['heuristic_path'] = heuristic_path
     results['path_names'] = " -> ".join([index_to_name[idx] for idx in results['path']])
     
     return results
 
+# =============================================================================
+# PARTE 1.1: REOTIMIZAÇÃO INCREMENTAL DO TSP
+# =============================================================================
+
+def _path_cost(dist_matrix, path):
+    """Custo de um caminho (lista de índices) somando as arestas consecutivas."""
+    return float(evaluate_tours(dist_matrix, [path])["distance"][0])
+
+def _two_opt(dist_matrix, path, neighbor_lists=None):
+    """
+    Busca local 2-opt sobre um tour fechado (path[0] == path[-1] == 0).
+    Inverte segmentos enquanto houver melhoria. Para cada aresta (a, b) só
+    testa como nova aresta (a, c) os NEIGHBOR_LIST_SIZE vizinhos mais próximos
+    de 'a' que estejam mais perto dele do que 'b'.
+    """
+    if neighbor_lists is None:
+        neighbor_lists = compute_neighbor_lists(dist_matrix)
+    candidates = [[int(v) for v in row[:NEIGHBOR_LIST_SIZE]] for row in neighbor_lists]
+    path = list(path)
+    improved = True
+    while improved:
+        improved = False
+        position = {node: k for k, node in enumerate(path[:-1])}
+        for i in range(1, len(path) - 2):
+            a, b = path[i - 1], path[i]
+            for c in candidates[a]:
+                if dist_matrix[a][c] >= dist_matrix[a][b]:
+                    break
+                j = position[c]
+                if j <= i or j >= len(path) - 1:
+                    continue
+                d = path[j + 1]
+                delta = (dist_matrix[a][c] + dist_matrix[b][d]
+                         - dist_matrix[a][b] - dist_matrix[c][d])
+                if delta < -1e-9:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    improved = True
+                    break
+            if improved:
+                break
+    return path
+
+def repair_tour(dist_matrix, nodes_data, previous_path_ids, neighbor_lists=None):
+    """
+    Repara um tour anterior (lista de IDs, fechado no ponto de partida) para
+    o novo conjunto 'nodes_data': pontos removidos são contornados (bypass) e
+    pontos adicionados entram por inserção mais barata. Depois aplica 2-opt.
+    Retorna (custo, caminho em índices de 'nodes_data').
+    """
+    id_to_idx = {node['id']: i for i, node in enumerate(nodes_data)}
+
+    # 1. Bypass: mantém a ordem anterior só com os pontos que continuam
+    tour = [id_to_idx[node_id] for node_id in previous_path_ids[:-1] if node_id in id_to_idx]
+    if not tour or tour[0] != 0:
+        tour = [0] + [idx for idx in tour if idx != 0]
+
+    # 2. Inserção mais barata dos pontos novos
+    in_tour = set(tour)
+    for idx in range(len(nodes_data)):
+        if idx in in_tour:
+            continue
+        best_delta, best_pos = float('inf'), len(tour)
+        for pos in range(1, len(tour) + 1):
+            prev_node = tour[pos - 1]
+            next_node = tour[pos] if pos < len(tour) else 0
+            delta = (dist_matrix[prev_node][idx] + dist_matrix[idx][next_node]
+                     - dist_matrix[prev_node][next_node])
+            if delta < best_delta:
+                best_delta, best_pos = delta, pos
+        tour.insert(best_pos, idx)
+        in_tour.add(idx)
+
+    # 3. Busca local
+    path = _two_opt(dist_matrix, tour + [0], neighbor_lists)
+    return _path_cost(dist_matrix, path), path
+
+def run_tsp_experiment_incremental(experiment_name, nodes_data, previous_path_ids, shared_bound=None):
+    """
+    Reotimiza o TSP quando o conjunto de pontos muda pouco em relação a uma
+    solução anterior ('previous_path_ids': o tour ótimo anterior em IDs).
+
+    O tour reparado vira a solução incumbente (limite superior) do B&B, que
+    então só precisa provar a otimalidade, com o limite inferior de
+    complemento ligado. Leve o bastante para rodar no próprio processo do
+    app, sem o portfólio. Retorna o mesmo formato de
+    'run_tsp_experiment', com 'warm_start_cost' e os IDs adicionados/removidos.
+    """
+    if len(nodes_data) < 2:
+        print("Erro B&B: Pelo menos 2 nós são necessários.")
+        return None
+
+    index_to_name = {i: node['nome'] for i, node in enumerate(nodes_data)}
+    dist_matrix = calculate_distance_matrix(nodes_data)
+
+    neighbor_lists = compute_neighbor_lists(dist_matrix)
+
+    stats = BnBStats()
+
+    # O "Cenário Atual" continua sendo o Vizinho Mais Próximo
+    heuristic_cost, heuristic_path = _calculate_heuristic_upper_bound(dist_matrix, neighbor_lists)
+
+    stats.start_time = time.time()
+    warm_cost, warm_path = repair_tour(dist_matrix, nodes_data, previous_path_ids, neighbor_lists)
+    if warm_cost <= heuristic_cost:
+        stats.upper_bound, stats.best_path = warm_cost, warm_path
+    else:
+        stats.upper_bound, stats.best_path = heuristic_cost, heuristic_path
+    _solve_tsp_branch_and_bound(dist_matrix, stats, shared_bound, neighbor_lists=neighbor_lists, completion_bound=True)
+    stats.end_time = time.time()
+
+    current_ids = {node['id'] for node in nodes_data}
+    previous_ids = set(previous_path_ids)
+
+    results = stats.get_results()
+    results['name'] = experiment_name
+    results['heuristic_cost'] = heuristic_cost
+    results['heuristic_path'] = heuristic_path
+    results['warm_start_cost'] = warm_cost
+    results['added_ids'] = sorted(current_ids - previous_ids)
+    results['removed_ids'] = sorted(previous_ids - current_ids)
+    results['path_names'] = " -> ".join([index_to_name[idx] for idx in results['path']])
+
+    return results
+
 # =============================================================================
 # PARTE 2: ALGORITMO HEURÍSTICO PARA ROTA COM ORÇAMENTO (Spec 5.1)
 # =============================================================================
 
+def _as_poi_store(all_nodes):
+    """
+    Devolve o POIStore por trás de 'all_nodes' (POIStore, lista de POIRow
+    do mesmo armazenamento na ordem original ou lista de dicionários).
+    """
+    if isinstance(all_nodes, POIStore):
+        return all_nodes
+    if all_nodes and isinstance(all_nodes[0], POIRow):
+        store = all_nodes[0]._store
+        if len(all_nodes) == len(store) and all(node._store is store and node.row == i for i, node in enumerate(all_nodes)):
+            return store
+    return POIStore.from_records([dict(node) for node in all_nodes])
+
+def store_row_or_node(all_nodes, index):
+    """Elemento 'index' de uma lista de pontos ou de um POIStore."""
+    return all_nodes.row(index) if isinstance(all_nodes, POIStore) else all_nodes[index]
+
 def solve_budget_route_heuristic(all_nodes, dist_matrix_full, id_to_index, max_time_min, max_cost, start_node_id=1):
     """
     Implementa uma heurística gulosa (Spec 5.1) para o problema de 
     orçamento (Prize Collecting).
+    'all_nodes' pode ser a lista de pontos ou o próprio POIStore.
     """
     
     route = []
@@ -221,7 +1001,7 @@ def solve_budget_route_heuristic(all_nodes, dist_matrix_full, id_to_index, max_t
     
     try:
         current_node_idx = id_to_index[start_node_id]
-        start_node_data = all_nodes[current_node_idx]
+        start_node_data = store_row_or_node(all_nodes, current_node_idx)
     except KeyError:
         log_messages.append(f"Erro: Nó inicial (ID {start_node_id}) não encontrado.")
         return [], {}, log_messages
@@ -238,45 +1018,38 @@ def solve_budget_route_heuristic(all_nodes, dist_matrix_full, id_to_index, max_t
         log_messages.append(f"Ponto de partida ({start_node_data['nome']}) excede o orçamento. Rota vazia.")
         return [], {}, log_messages
 
-    # 2. Loop Guloso
+    # 2. Loop Guloso (vetorizado sobre as colunas do armazenamento)
+    store = _as_poi_store(all_nodes)
+    matrix_index = np.array([id_to_index[node_id] for node_id in store.ids.tolist()])
+    visit_times = store.column('tempo_visita_min').astype(float)
+    visit_costs = store.column('custo_entrada').astype(float)
+    popularity = store.column('popularidade').astype(float)
+    available = ~np.isin(store.ids, list(visited_ids))
+
     while True:
-        best_candidate = None
-        best_score = -1
-        
         last_node_idx = id_to_index[route[-1]['id']]
 
-        for candidate_node in all_nodes:
-            if candidate_node['id'] not in visited_ids:
-                
-                candidate_idx = id_to_index[candidate_node['id']]
-                
-                travel_dist = dist_matrix_full[last_node_idx][candidate_idx]
-                travel_time = calculate_travel_time(travel_dist, AVG_SPEED_KMH)
-                visit_time = candidate_node['tempo_visita_min']
-                visit_cost = candidate_node['custo_entrada']
+        travel_dists = dist_matrix_full[last_node_idx][matrix_index]
+        travel_times = calculate_travel_time(travel_dists, AVG_SPEED_KMH)
+        time_if_added = route_time + travel_times + visit_times
+        cost_if_added = route_cost + visit_costs
+        feasible = available & (time_if_added <= max_time_min) & (cost_if_added <= max_cost)
 
-                time_if_added = route_time + travel_time + visit_time
-                cost_if_added = route_cost + visit_cost
-                
-                if time_if_added <= max_time_min and cost_if_added <= max_cost:
-                    # Função Objetivo (Heurística)
-                    time_cost = travel_time + visit_time + 1 
-                    score = candidate_node['popularidade'] / time_cost
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_candidate = candidate_node
-        
         # 3. Adicionar o melhor candidato
-        if best_candidate:
-            candidate_idx = id_to_index[best_candidate['id']]
-            travel_dist = dist_matrix_full[last_node_idx][candidate_idx]
-            travel_time = calculate_travel_time(travel_dist, AVG_SPEED_KMH)
+        if feasible.any():
+            # Função Objetivo (Heurística); argmax devolve o primeiro empate,
+            # como a varredura original na ordem do catálogo
+            scores = popularity / (travel_times + visit_times + 1)
+            best_row = int(np.argmax(np.where(feasible, scores, -np.inf)))
+            best_candidate = all_nodes[best_row] if not isinstance(all_nodes, POIStore) else store.row(best_row)
+            travel_dist = travel_dists[best_row]
+            travel_time = float(travel_times[best_row])
             
             route_time += travel_time + best_candidate['tempo_visita_min']
             route_cost += best_candidate['custo_entrada']
             route_popularity += best_candidate['popularidade']
             visited_ids.add(best_candidate['id'])
+            available[best_row] = False
             route.append(best_candidate)
             
             log_messages.append(f"  -> Adicionando: {best_candidate['nome']} (Dist: {travel_dist:.1f}km, Tempo Viagem: {travel_time:.0f}min)")
@@ -295,4 +1068,12 @@ def solve_budget_route_heuristic(all_nodes, dist_matrix_full, id_to_index, max_t
         "path_names": " -> ".join([node['nome'] for node in route])
     }
     
-    return route, summary, log_messages
\ No newline at end of file
+    return route, summary, log_messages
+
+if __name__ == '__main__':
+    # Carga em streaming de um ou mais CSVs: python algoritmos.py a.csv b.csv
+    store, stats = stream_poi_store(sys.argv[1:] or CSV_FILE)
+    print(f"{stats['rows_read']} linhas lidas de {stats['files']} arquivo(s) em {stats['time']:.2f} s "
+          f"({stats['rows_per_sec']:,.0f} linhas/s): {stats['rows_kept']} pontos mantidos, "
+          f"{stats['invalid']} inválidos, {stats['duplicate_ids']} IDs repetidos, "
+          f"{stats['duplicate_coords']} duplicatas por coordenada. Armazenamento: {store.nbytes / 1e6:.1f} MB.")
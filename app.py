@@ -1,9 +1,16 @@
+import os
 import streamlit as st
 import pandas as pd
 import altair as alt
 import numpy as np
 import algoritmos as alg
 import solver_pulp as pulp_solver 
+import planejador_multidias as multidias
+import portfolio
+import pareto_orcamento
+import atlas_tsp
+import atualizacao_dados
+import profiling
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -13,9 +20,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- Profiling opcional (TURISMO_PROFILE=1 ou ?profile=1 na URL) ---
+profiling.start_rerun(st.query_params.get("profile"))
+
 # --- Constante (para o README) ---
 KAGGLE_URL = "https.kaggle.com/datasets/mathiasart/turismo-em-curitiba"
 
+# Até quantos pontos adicionados/removidos a rota anterior é reaproveitada
+INCREMENTAL_MAX_DELTA = 3
+
 
 # =============================================================================
 # CSS 10/10 - O GÊNIO (COM A CORREÇÃO DE SINTAXE)
@@ -187,31 +200,55 @@ def format_path_as_list(path_names_str):
     return md_list
 
 # --- Carregamento de Dados (Cache) ---
-@st.cache_data
-def load_data_cached():
-    """ Carrega, limpa e prepara os dados, armazenando em cache."""
-    df, all_nodes, id_map, dist_matrix = alg.load_data()
+@profiling.counted_cache(st.cache_data(max_entries=1))
+def load_data_cached(dataset_version):
+    """
+    Carrega, limpa e prepara os dados, armazenando em cache. 'dataset_version'
+    muda quando o CSV é alterado; a matriz de distâncias é então atualizada
+    só nas linhas dos pontos alterados.
+    """
+    df, poi_store, dist_matrix, data_diff = atualizacao_dados.load_with_diff()
     if df is None:
         st.error(f"Erro fatal ao carregar o arquivo '{alg.CSV_FILE}'. Verifique se o arquivo está na pasta.")
         st.stop()
     
-    jardim_botanico_node = next((node for node in all_nodes if node['id'] == 1), None)
-    
-    if jardim_botanico_node is None:
+    if 1 not in poi_store.id_to_row:
         st.error("Erro fatal: Jardim Botânico (ID 1) não encontrado no CSV.")
         st.stop()
         
     df_sem_jb = df[df['id'] != 1].copy()
     
-    return df, all_nodes, id_map, dist_matrix, jardim_botanico_node, df_sem_jb
+    return df, poi_store, dist_matrix, df_sem_jb, data_diff
+
+# Carrega os dados (as linhas são visões do armazenamento colunar)
+with profiling.section("load_data_cached", "dados"):
+    df, poi_store, dist_matrix_full, df_sem_jb, data_diff = load_data_cached(atualizacao_dados.dataset_version())
+all_nodes = poi_store.rows()
+id_to_index = poi_store.id_to_row
+JARDIM_BOTANICO = poi_store.row_for_id(1)
 
-# Carrega os dados
-df, all_nodes, id_to_index, dist_matrix_full, JARDIM_BOTANICO, df_sem_jb = load_data_cached()
+# Última rota da sessão: descartada se envolve pontos alterados no CSV
+session_solution = st.session_state.get('tsp_last_solution')
+if session_solution is not None and atualizacao_dados.is_result_stale(session_solution['path_ids'], session_solution['fingerprint'], data_diff):
+    del st.session_state['tsp_last_solution']
+
+@profiling.counted_cache(st.cache_resource(max_entries=1))
+def load_tsp_atlas_cached(fingerprint):
+    """ Atlas de rotas ótimas (memmap, compartilhado entre sessões)."""
+    return atlas_tsp.load_or_build_atlas(poi_store, start_node_id=JARDIM_BOTANICO['id'],
+                                         dist_matrix_full=dist_matrix_full, fingerprint=fingerprint)
+
+@profiling.counted_cache(st.cache_data(max_entries=1))
+def load_pareto_table_cached(fingerprint):
+    """ Tabela pré-calculada da Rota por Orçamento (toda a grade dos sliders)."""
+    return pareto_orcamento.load_or_build_pareto_table(all_nodes, dist_matrix_full, id_to_index,
+                                                       start_node_id=JARDIM_BOTANICO['id'], diff=data_diff)
 
 
 # =============================================================================
 # PÁGINA 1: ANÁLISE EXPLORATÓRIA (EDA)
 # =============================================================================
+@profiling.profiled(kind="página")
 def render_eda_page():
     st.header("📊 Análise Exploratória dos Pontos Turísticos", divider='rainbow')
     
@@ -226,32 +263,35 @@ def render_eda_page():
     with c1:
         with st.container(border=True):
             st.subheader("Distribuição de Custos de Entrada")
-            chart_custo = alt.Chart(df).mark_bar().encode(
-                x=alt.X('custo_entrada:Q', bin=True, title='Custo da Entrada (R$)'),
-                y=alt.Y('count()', title='Contagem de Locais'),
-                tooltip=['custo_entrada', 'count()']
-            ).interactive()
-            st.altair_chart(chart_custo, use_container_width=True)
+            with profiling.section("altair: custos de entrada", "gráfico"):
+                chart_custo = alt.Chart(df).mark_bar().encode(
+                    x=alt.X('custo_entrada:Q', bin=True, title='Custo da Entrada (R$)'),
+                    y=alt.Y('count()', title='Contagem de Locais'),
+                    tooltip=['custo_entrada', 'count()']
+                ).interactive()
+                st.altair_chart(chart_custo, use_container_width=True)
         
         with st.container(border=True):
             st.subheader("Popularidade vs. Avaliação")
-            chart_pop_aval = alt.Chart(df).mark_circle(size=60).encode(
-                x=alt.X('avaliacao:Q', title='Avaliação (0-5)'),
-                y=alt.Y('popularidade:Q', title='Popularidade (0-100)'),
-                color='categoria',
-                tooltip=['nome', 'avaliacao', 'popularidade', 'categoria']
-            ).interactive()
-            st.altair_chart(chart_pop_aval, use_container_width=True)
+            with profiling.section("altair: popularidade x avaliação", "gráfico"):
+                chart_pop_aval = alt.Chart(df).mark_circle(size=60).encode(
+                    x=alt.X('avaliacao:Q', title='Avaliação (0-5)'),
+                    y=alt.Y('popularidade:Q', title='Popularidade (0-100)'),
+                    color='categoria',
+                    tooltip=['nome', 'avaliacao', 'popularidade', 'categoria']
+                ).interactive()
+                st.altair_chart(chart_pop_aval, use_container_width=True)
 
     with c2:
         with st.container(border=True):
             st.subheader("Tempo de Visita por Categoria")
-            chart_tempo_cat = alt.Chart(df).mark_boxplot().encode(
-                x=alt.X('categoria:N', title='Categoria'),
-                y=alt.Y('tempo_visita_min:Q', title='Tempo de Visita (min)'),
-                tooltip=['categoria', 'tempo_visita_min']
-            ).interactive()
-            st.altair_chart(chart_tempo_cat, use_container_width=True)
+            with profiling.section("altair: tempo por categoria", "gráfico"):
+                chart_tempo_cat = alt.Chart(df).mark_boxplot().encode(
+                    x=alt.X('categoria:N', title='Categoria'),
+                    y=alt.Y('tempo_visita_min:Q', title='Tempo de Visita (min)'),
+                    tooltip=['categoria', 'tempo_visita_min']
+                ).interactive()
+                st.altair_chart(chart_tempo_cat, use_container_width=True)
 
     with st.expander("Ver Tabela de Dados Completa", expanded=False):
         with st.container(border=True):
@@ -260,19 +300,39 @@ def render_eda_page():
 # =============================================================================
 # PÁGINA 2: ROTA POR ORÇAMENTO (HEURÍSTICA)
 # =============================================================================
+@profiling.profiled(kind="página")
 def render_budget_page(user_budget_min, user_budget_custo, btn_calc_budget):
     st.header("💰 Planejador de Rota por Orçamento", divider='rainbow')
     st.markdown("Defina seu orçamento de tempo e custo na barra lateral para encontrar a melhor rota (maximizando popularidade), **partindo do Jardim Botânico**.")
 
+    with profiling.section("load_pareto_table_cached", "dados"):
+        pareto_table = load_pareto_table_cached(data_diff['fingerprint'])
+
     if btn_calc_budget:
-        route_nodes, summary, log = alg.solve_budget_route_heuristic(
-            all_nodes, 
-            dist_matrix_full, 
-            id_to_index,
-            user_budget_min,
-            user_budget_custo,
-            start_node_id=JARDIM_BOTANICO['id']
-        )
+        cell = pareto_orcamento.lookup(pareto_table, user_budget_min, user_budget_custo)
+        if cell is not None:
+            # Orçamento na grade: resposta instantânea pela tabela pré-calculada
+            route_ids, route_time, route_cost, route_popularity = cell
+            route_nodes = poi_store.rows(poi_store.indices_for_ids(route_ids))
+            summary = {
+                "score_popularidade": route_popularity,
+                "tempo_total_gasto": route_time,
+                "custo_total_gasto": route_cost,
+                "tempo_max": user_budget_min,
+                "custo_max": user_budget_custo,
+                "path_names": " -> ".join([node['nome'] for node in route_nodes])
+            }
+            log = ["Resultado consultado na tabela pré-calculada (mesma heurística gulosa, resolvida para toda a grade)."]
+        else:
+            with profiling.section("solve_budget_route_heuristic", "solver"):
+                route_nodes, summary, log = alg.solve_budget_route_heuristic(
+                    poi_store, 
+                    dist_matrix_full, 
+                    id_to_index,
+                    user_budget_min,
+                    user_budget_custo,
+                    start_node_id=JARDIM_BOTANICO['id']
+                )
         
         st.subheader("Resultados da Otimização")
 
@@ -289,17 +349,30 @@ def render_budget_page(user_budget_min, user_budget_custo, btn_calc_budget):
                 st.subheader("Rota Sugerida")
                 st.markdown(f"**Ordem de visita:** {summary['path_names']}")
                 route_df = pd.DataFrame(route_nodes)
-                st.map(route_df, latitude='latitude', longitude='longitude', size=50)
+                with profiling.section("st.map", "mapa"):
+                    st.map(route_df, latitude='latitude', longitude='longitude', size=50)
 
             with st.expander("Ver log de execução da heurística", expanded=False):
                 st.code("\n".join(log), language=None)
     else:
         st.info("Ajuste os parâmetros na barra lateral e clique em 'Calcular Rota por Orçamento'.")
 
+    with st.expander("Ver Fronteira de Pareto (Popularidade x Tempo x Custo)", expanded=False):
+        df_frontier = pd.DataFrame(pareto_orcamento.frontier_records(pareto_table))
+        chart_frontier = alt.Chart(df_frontier).mark_circle(size=60).encode(
+            x=alt.X('Tempo Gasto (min):Q', title='Tempo Gasto (min)'),
+            y=alt.Y('Popularidade:Q', title='Score de Popularidade'),
+            color=alt.Color('Custo Gasto (R$):Q', title='Custo Gasto (R$)'),
+            tooltip=['Horas Disponíveis', 'Orçamento (R$)', 'Tempo Gasto (min)', 'Custo Gasto (R$)', 'Popularidade']
+        ).interactive()
+        st.altair_chart(chart_frontier, use_container_width=True)
+        st.caption(f"{len(df_frontier)} rotas não dominadas entre as {pareto_table['popularity'].size} combinações de orçamento da barra lateral.")
+
 # =============================================================================
 # PÁGINA 3: OTIMIZADOR DE ROTA (TSP) - LAYOUT 10/10
 # =============================================================================
-def render_tsp_page(selected_node_names, cost_per_km, cost_per_hour, avg_speed_kmh, btn_calc_tsp):
+@profiling.profiled(kind="página")
+def render_tsp_page(selected_node_names, cost_per_km, cost_per_hour, avg_speed_kmh, btn_calc_tsp, pulp_config=None, use_atlas=False):
     st.header("🚚 Otimizador de Rota (TSP) com Análise de Budget", divider='rainbow')
     st.markdown("Selecione na barra lateral os pontos que deseja visitar. O sistema calculará a rota mais curta **(partindo e voltando ao Jardim Botânico)** e o impacto financeiro dessa otimização.")
 
@@ -308,25 +381,77 @@ def render_tsp_page(selected_node_names, cost_per_km, cost_per_hour, avg_speed_k
             st.error("Por favor, selecione pelo menos 2 pontos para visitar (além do Jardim Botânico).")
             return
 
-        selected_nodes_data = [node for node in all_nodes if node['nome'] in selected_node_names]
+        selected_nodes_data = poi_store.rows(poi_store.indices_for_names(selected_node_names))
         nodes_for_solver = [JARDIM_BOTANICO] + selected_nodes_data
         experiment_name = f"Rota de {len(nodes_for_solver)} pontos"
         
-        with st.spinner(f"Calculando rotas ótimas para '{experiment_name}'... (Isso pode levar alguns segundos)"):
-            result_bnb = alg.run_tsp_experiment(experiment_name, nodes_for_solver)
-            result_pulp = pulp_solver.solve_tsp_with_pulp(experiment_name, nodes_for_solver)
+        # Reaproveita a última solução da sessão quando a seleção muda pouco
+        last_solution = st.session_state.get('tsp_last_solution')
+        current_ids = {node['id'] for node in nodes_for_solver}
+        # Só com alguma mudança (a mesma seleção roda o portfólio e mostra a
+        # validação B&B vs PuLP) e a partir de uma rota dos solvers, não do atlas
+        use_incremental = (
+            last_solution is not None
+            and not last_solution.get('from_atlas', False)
+            and 1 <= len(current_ids ^ set(last_solution['path_ids'])) <= INCREMENTAL_MAX_DELTA
+        )
 
-        if not result_bnb or not result_pulp:
-            st.error("Falha ao calcular a rota. Verifique o console para mais detalhes.")
-            return
+        # Atlas: resposta O(1) para qualquer seleção, sem rodar os solvers
+        result_atlas = None
+        if use_atlas:
+            with profiling.section("atlas_tsp.run_tsp_from_atlas", "solver"):
+                result_atlas = atlas_tsp.run_tsp_from_atlas(load_tsp_atlas_cached(data_diff['fingerprint']), experiment_name, nodes_for_solver)
+
+        if result_atlas is not None:
+            portfolio_result, result_bnb, result_pulp = None, result_atlas, None
+        elif use_incremental:
+            # Poucas mudanças: o B&B com warm start roda aqui mesmo, sem abrir
+            # os processos do portfólio (e sem o PuLP para validar)
+            with profiling.section("alg.run_tsp_experiment_incremental", "solver"):
+                result_bnb = alg.run_tsp_experiment_incremental(experiment_name, nodes_for_solver, last_solution['path_ids'])
+            portfolio_result, result_pulp = None, None
+
+            if not result_bnb:
+                st.error("Falha ao calcular a rota. Verifique o console para mais detalhes.")
+                return
+        else:
+            with st.spinner(f"Calculando rotas ótimas para '{experiment_name}'... (Isso pode levar alguns segundos)"):
+                # B&B e PuLP rodam em paralelo; esperamos ambos para o card de validação
+                with profiling.section("portfolio.run_tsp_portfolio", "solver"):
+                    portfolio_result = portfolio.run_tsp_portfolio(
+                        experiment_name,
+                        nodes_for_solver,
+                        solvers=("bnb", "pulp"),
+                        mode=portfolio.MODE_ALL,
+                        solver_configs={"pulp": pulp_config}
+                    )
+                result_bnb = portfolio_result['results'].get('bnb') if portfolio_result else None
+                result_pulp = portfolio_result['results'].get('pulp') if portfolio_result else None
+
+            if not result_bnb or not result_pulp:
+                st.error("Falha ao calcular a rota. Verifique o console para mais detalhes.")
+                return
+
+        st.session_state['tsp_last_solution'] = {
+            'path_ids': [nodes_for_solver[idx]['id'] for idx in result_bnb['path']],
+            'cost': result_bnb['cost'],
+            'fingerprint': data_diff['fingerprint'],
+            'from_atlas': result_atlas is not None,
+        }
+        if result_atlas is not None:
+            st.caption(f"📚 Rota ótima consultada no atlas pré-calculado em {result_atlas['time'] * 1000:.2f} ms.")
+        elif use_incremental:
+            st.caption(f"♻️ Reotimização incremental a partir da rota anterior (+{len(result_bnb['added_ids'])} / -{len(result_bnb['removed_ids'])} pontos).")
 
         st.success(f"Otimização concluída para {experiment_name}!")
 
         # --- Cálculos de Budget ---
-        dist_atual = result_bnb['heuristic_cost']
-        dist_otimizada = result_bnb['cost']
-        time_atual_h = dist_atual / avg_speed_kmh
-        time_otimizada_h = dist_otimizada / avg_speed_kmh
+        # Os dois tours (heurística e ótimo) avaliados de uma vez na matriz completa
+        catalog_rows = np.array([node.row for node in nodes_for_solver])
+        tours = alg.pad_tours([catalog_rows[result_bnb['heuristic_path']], catalog_rows[result_bnb['path']]])
+        scores = alg.evaluate_tours(dist_matrix_full, tours, avg_speed_kmh=avg_speed_kmh)
+        dist_atual, dist_otimizada = scores['distance']
+        time_atual_h, time_otimizada_h = scores['travel_time'] / 60
         cost_km_atual = dist_atual * cost_per_km
         cost_hora_atual = time_atual_h * cost_per_hour
         total_atual = cost_km_atual + cost_hora_atual
@@ -355,38 +480,78 @@ def render_tsp_page(selected_node_names, cost_per_km, cost_per_hour, avg_speed_k
                 st.subheader("🗺️ Rota Otimizada (B&B)")
                 route_nodes_optimized = [nodes_for_solver[i] for i in result_bnb['path']]
                 route_df_optimized = pd.DataFrame(route_nodes_optimized)
-                st.map(route_df_optimized, latitude='latitude', longitude='longitude', size=50, height=400)
+                with profiling.section("st.map", "mapa"):
+                    st.map(route_df_optimized, latitude='latitude', longitude='longitude', size=50, height=400)
                 
                 st.subheader("Ordem de Visita")
                 st.markdown(format_path_as_list(result_bnb['path_names']))
 
         with col_metrics:
-            # --- CARD 2.2: MÉTRICAS DO B&B (REQUISITO 4.3) ---
-            with st.container(border=True):
-                st.subheader("📊 Métricas do Algoritmo (B&B)")
-                kpi_b1, kpi_b2, kpi_b3 = st.columns(3)
-                kpi_b1.metric("Nós", f"{result_bnb['nodes']:,}")
-                kpi_b2.metric("Podas", f"{result_bnb['pruned']:,}")
-                kpi_b3.metric("Tempo (s)", f"{result_bnb['time']:.4f}")
-                st.divider()
-                st.subheader("📈 Limites (Bounds)")
-                kpi_l1, kpi_l2 = st.columns(2)
-                kpi_l1.metric("Superior (Heurística)", f"{result_bnb['heuristic_cost']:.2f} km")
-                kpi_l2.metric("Ótimo (B&B)", f"{result_bnb['cost']:.2f} km")
+            if result_atlas is not None:
+                # --- CARD 2.2 (ATLAS): CONSULTA PRÉ-CALCULADA ---
+                with st.container(border=True):
+                    st.subheader("📚 Atlas de Rotas Ótimas")
+                    kpi_a1, kpi_a2 = st.columns(2)
+                    kpi_a1.metric("Consulta (ms)", f"{result_atlas['time'] * 1000:.2f}")
+                    kpi_a2.metric("Subconjuntos", f"{result_atlas['atlas_size']:,}")
+                    st.caption("Rotas ótimas de todas as seleções possíveis, calculadas offline por Programação Dinâmica (Held-Karp). Desmarque o atlas na barra lateral para rodar B&B vs PuLP.")
+                    st.divider()
+                    st.subheader("📈 Limites (Bounds)")
+                    kpi_l1, kpi_l2 = st.columns(2)
+                    kpi_l1.metric("Superior (Heurística)", f"{result_bnb['heuristic_cost']:.2f} km")
+                    kpi_l2.metric("Ótimo (Atlas)", f"{result_bnb['cost']:.2f} km")
+            else:
+                # --- CARD 2.2: MÉTRICAS DO B&B (REQUISITO 4.3) ---
+                with st.container(border=True):
+                    st.subheader("📊 Métricas do Algoritmo (B&B)")
+                    kpi_b1, kpi_b2, kpi_b3 = st.columns(3)
+                    kpi_b1.metric("Nós", f"{result_bnb['nodes']:,}")
+                    kpi_b2.metric("Podas", f"{result_bnb['pruned']:,}")
+                    kpi_b3.metric("Tempo (s)", f"{result_bnb['time']:.4f}")
+                    st.caption(f"Dominância: {result_bnb['dominance_hits']:,} podas ({result_bnb['dominance_hit_rate']:.1%} das consultas)  |  Simetria: {result_bnb['symmetry_pruned']:,} podas")
+                    if result_bnb['time_to_best'] is not None:
+                        st.caption(f"Melhor solução encontrada em {result_bnb['time_to_best']:.4f} s ({result_bnb['incumbent_updates']} melhorias da incumbente)")
+                    st.divider()
+                    st.subheader("📈 Limites (Bounds)")
+                    kpi_l1, kpi_l2 = st.columns(2)
+                    kpi_l1.metric("Superior (Heurística)", f"{result_bnb['heuristic_cost']:.2f} km")
+                    kpi_l2.metric("Ótimo (B&B)", f"{result_bnb['cost']:.2f} km")
             
-            # --- CARD 2.3: COMPARAÇÃO DE SOLVERS ---
-            with st.container(border=True):
-                st.subheader("⏱️ Validação (B&B vs PuLP)")
-                data_perf = {
-                    "Métrica": ["Distância (km)", "Tempo (s)"],
-                    "B&B Puro (Python)": [f"{result_bnb['cost']:.2f}", f"{result_bnb['time']:.4f}"],
-                    "PuLP (Branch & Cut)": [f"{result_pulp['cost']:.2f}", f"{result_pulp['time']:.4f}"]
-                }
-                st.dataframe(pd.DataFrame(data_perf).set_index('Métrica'), use_container_width=True)
-                if np.allclose(result_bnb['cost'], result_pulp['cost']):
-                    st.success("✅ Verificado: Soluções idênticas!")
+                # --- CARD 2.3: COMPARAÇÃO DE SOLVERS ---
+                if result_pulp is None:
+                    st.caption(f"♻️ Reotimização incremental: só o B&B rodou, com a rota anterior como warm start. Mudanças de mais de {INCREMENTAL_MAX_DELTA} pontos rodam B&B e PuLP em paralelo para a validação.")
                 else:
-                    st.error("❌ Atenção: Soluções divergentes.")
+                    with st.container(border=True):
+                        st.subheader("⏱️ Validação (B&B vs PuLP)")
+                        timings = portfolio_result['timings']
+                        data_perf = {
+                            "Métrica": ["Distância (km)", "Tempo (s)", "Tempo no Processo (s)"],
+                            "B&B Puro (Python)": [f"{result_bnb['cost']:.2f}", f"{result_bnb['time']:.4f}", f"{timings['bnb']:.4f}"],
+                            "PuLP (Branch & Cut)": [f"{result_pulp['cost']:.2f}", f"{result_pulp['time']:.4f}", f"{timings['pulp']:.4f}"]
+                        }
+                        st.dataframe(pd.DataFrame(data_perf).set_index('Métrica'), use_container_width=True)
+                        st.caption(f"Execução concorrente: {portfolio_result['wall_time']:.4f} s no total (primeiro a terminar: {portfolio_result['winner']}).")
+                        if np.allclose(result_bnb['cost'], result_pulp['cost']):
+                            st.success("✅ Verificado: Soluções idênticas!")
+                        else:
+                            st.error("❌ Atenção: Soluções divergentes.")
+                        if not result_pulp['optimal']:
+                            st.warning("⚠️ O PuLP parou pelo limite de tempo/gap: a solução dele é viável, mas não comprovadamente ótima.")
+
+                    with st.expander(f"Ver Estatísticas do Solver MIP ({result_pulp['backend']})"):
+                        data_solver = {
+                            "Métrica": ["Backend", "Threads", "Tempo de Modelagem (Python, s)", "Tempo do Solver (s)", "Nós do B&B", "Limite Inferior Final (km)", "Status"],
+                            "Valor": [
+                                result_pulp['backend'],
+                                f"{result_pulp['config']['threads']}",
+                                f"{result_pulp['model_time']:.4f}",
+                                f"{result_pulp['solver_time']:.4f}",
+                                "-" if result_pulp['nodes'] is None else f"{result_pulp['nodes']:,}",
+                                "-" if result_pulp['best_bound'] is None else f"{result_pulp['best_bound']:.2f}",
+                                result_pulp['solver_status']
+                            ]
+                        }
+                        st.dataframe(pd.DataFrame(data_solver).set_index('Métrica'), use_container_width=True)
             
             with st.expander("Ver Detalhamento Financeiro (Tabela)"):
                 data_budget = {
@@ -404,12 +569,14 @@ def render_tsp_page(selected_node_names, cost_per_km, cost_per_hour, avg_speed_k
 # =============================================================================
 # PÁGINA 4: ANÁLISE DE SENSIBILIDADE
 # =============================================================================
+@profiling.profiled(kind="página")
 def render_sensitivity_page(cost_per_hour_sens, avg_speed_kmh_sens):
     st.header("🔬 Análise de Sensibilidade (Requisito 5.2)", divider='rainbow')
     st.markdown("Esta análise avalia o impacto de um parâmetro (Custo por KM) no resultado financeiro final (Custo Total da Rota), mantendo a rota otimizada fixa.")
 
-    nodes_for_solver = [JARDIM_BOTANICO] + [node for node in all_nodes if node['nome'] in df_sem_jb['nome'].head(5).tolist()]
-    result_bnb = alg.run_tsp_experiment("Rota Fixa (Sensibilidade)", nodes_for_solver)
+    nodes_for_solver = [JARDIM_BOTANICO] + poi_store.rows(poi_store.indices_for_names(df_sem_jb['nome'].head(5).tolist()))
+    with profiling.section("run_tsp_experiment", "solver"):
+        result_bnb = alg.run_tsp_experiment("Rota Fixa (Sensibilidade)", nodes_for_solver)
     
     if not result_bnb:
         st.error("Não foi possível calcular a rota base para a análise.")
@@ -441,6 +608,7 @@ def render_sensitivity_page(cost_per_hour_sens, avg_speed_kmh_sens):
 # =============================================================================
 # PÁGINA 5: MODELAGEM MATEMÁTICA
 # =============================================================================
+@profiling.profiled(kind="página")
 def render_modeling_page():
     st.header("🧮 Modelagem Matemática e Cálculos", divider='rainbow')
     st.markdown("Esta página detalha as fórmulas algébricas e os modelos de otimização utilizados no projeto.")
@@ -474,6 +642,7 @@ def render_modeling_page():
 # =============================================================================
 # PÁGINA 6: SOBRE O PROJETO
 # =============================================================================
+@profiling.profiled(kind="página")
 def render_about_page():
     st.header("ℹ️ Sobre o Projeto", divider='rainbow')
     
@@ -498,6 +667,57 @@ def render_about_page():
     3.  **PuLP (Branch & Cut):** Formulação de PLI que usa um solver profissional para validar a solução ótima.
     """)
 
+# =============================================================================
+# PÁGINA 7: ROTEIRO DE VÁRIOS DIAS
+# =============================================================================
+@profiling.profiled(kind="página")
+def render_multi_day_page(num_days, hours_per_day, cost_per_day, btn_calc_multi):
+    st.header("📅 Roteiro de Vários Dias", divider='rainbow')
+    st.markdown("Divide os pontos turísticos em roteiros diários, **saindo e voltando ao Jardim Botânico** todos os dias, respeitando o limite diário de tempo e de custo com entradas.")
+
+    if btn_calc_multi:
+        with st.spinner(f"Planejando {num_days} dias (cada dia é resolvido em paralelo)..."):
+            with profiling.section("plan_multi_day_itinerary", "solver"):
+                plan = multidias.plan_multi_day_itinerary(
+                    all_nodes,
+                    JARDIM_BOTANICO,
+                    num_days,
+                    hours_per_day * 60,
+                    cost_per_day
+                )
+
+        if not plan:
+            st.error("Não foi possível gerar o roteiro.")
+            return
+
+        with st.container(border=True):
+            kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+            kpi1.metric("Pontos Visitados", f"{sum(len(day['route']) - 2 for day in plan['days'])}")
+            kpi2.metric("Distância Total", f"{sum(day['distance_km'] for day in plan['days']):.2f} km")
+            kpi3.metric("Custo Total", f"R$ {sum(day['cost'] for day in plan['days']):.2f}")
+            kpi4.metric("Tempo de Cálculo (s)", f"{plan['time']:.4f}")
+
+        for day in plan['days']:
+            with st.container(border=True):
+                st.subheader(f"Dia {day['day']}")
+                if len(day['route']) <= 2:
+                    st.info("Dia livre: nenhum ponto alocado.")
+                    continue
+                col_map, col_info = st.columns([2, 1])
+                with col_map:
+                    with profiling.section("st.map", "mapa"):
+                        st.map(pd.DataFrame(day['route']), latitude='latitude', longitude='longitude', size=50, height=300)
+                with col_info:
+                    kpi_d1, kpi_d2 = st.columns(2)
+                    kpi_d1.metric("Tempo", f"{day['time_min']:.0f} min")
+                    kpi_d2.metric("Custo", f"R$ {day['cost']:.2f}")
+                    st.markdown(format_path_as_list(day['path_names']))
+
+        if plan['unassigned']:
+            st.warning("Pontos que não couberam no orçamento diário: " + ", ".join(node['nome'] for node in plan['unassigned']))
+    else:
+        st.info("Ajuste os parâmetros na barra lateral e clique em 'Planejar Roteiro'.")
+
 # =============================================================================
 # LÓGICA PRINCIPAL (MAIN)
 # =============================================================================
@@ -513,6 +733,7 @@ page_options = {
     "🏠 Análise Exploratória (EDA)": render_eda_page,
     "💰 Rota por Orçamento (Heurística)": render_budget_page,
     "🚚 Otimizador de Rota (TSP)": render_tsp_page,
+    "📅 Roteiro de Vários Dias": render_multi_day_page,
     "🔬 Análise de Sensibilidade": render_sensitivity_page,
     "🧮 Modelagem Matemática": render_modeling_page,
     "ℹ️ Sobre o Projeto": render_about_page
@@ -546,9 +767,36 @@ elif page_selection == "🚚 Otimizador de Rota (TSP)":
     cost_per_km = st.sidebar.number_input("Custo por KM (R$)", 0.1, 10.0, 2.50, 0.1, key="tsp_km")
     cost_per_hour = st.sidebar.number_input("Custo por Hora (Guia) (R$)", 1.0, 200.0, 30.0, 1.0, key="tsp_hr")
     avg_speed_kmh = st.sidebar.number_input("Velocidade Média (km/h)", 1.0, 80.0, float(alg.AVG_SPEED_KMH), 1.0, key="tsp_spd")
+    with st.sidebar.expander("Configuração do Solver (PuLP)"):
+        pulp_backend = st.selectbox("Backend", ["AUTO"] + pulp_solver.available_backends(), key="tsp_backend")
+        pulp_threads = st.number_input("Threads", 1, os.cpu_count() or 1, os.cpu_count() or 1, 1, key="tsp_threads")
+        pulp_time_limit = st.number_input("Limite de Tempo (s, 0 = sem limite)", 0, 600, 0, 5, key="tsp_time_limit")
+        pulp_gap = st.number_input("Gap Relativo (%)", 0.0, 10.0, 0.0, 0.1, key="tsp_gap")
+        pulp_presolve = st.checkbox("Presolve", value=True, key="tsp_presolve")
+    pulp_config = pulp_solver.SolverConfig(
+        backend=pulp_backend,
+        threads=int(pulp_threads),
+        time_limit=pulp_time_limit or None,
+        gap_rel=pulp_gap / 100 if pulp_gap else None,
+        presolve=pulp_presolve
+    )
+    atlas_available = atlas_tsp.fits_atlas(len(poi_store))
+    use_atlas = st.sidebar.checkbox("📚 Consultar atlas pré-calculado (resposta instantânea)", value=atlas_available,
+                                    disabled=not atlas_available, key="tsp_atlas",
+                                    help=None if atlas_available else f"Indisponível: o catálogo passa de {atlas_tsp.MAX_ATLAS_POINTS} pontos.")
     btn_calc_tsp = st.sidebar.button("📊 Otimizar Rota e Calcular Impacto", use_container_width=True)
     
-    render_tsp_page(selected_node_names, cost_per_km, cost_per_hour, avg_speed_kmh, btn_calc_tsp)
+    render_tsp_page(selected_node_names, cost_per_km, cost_per_hour, avg_speed_kmh, btn_calc_tsp, pulp_config, use_atlas)
+
+elif page_selection == "📅 Roteiro de Vários Dias":
+    st.sidebar.header("Defina sua Viagem")
+    st.sidebar.info("**Base Fixa (saída e volta diária):**\nJardim Botânico")
+    num_days = st.sidebar.slider("Quantos dias?", 2, 5, 3, 1)
+    hours_per_day = st.sidebar.slider("Horas disponíveis por dia?", 1.0, 12.0, 8.0, 0.5)
+    cost_per_day = st.sidebar.slider("Orçamento diário para entradas (R$)?", 0, 200, 50, 5)
+    btn_calc_multi = st.sidebar.button("📅 Planejar Roteiro", use_container_width=True)
+
+    render_multi_day_page(num_days, hours_per_day, cost_per_day, btn_calc_multi)
 
 elif page_selection == "🔬 Análise de Sensibilidade":
     st.sidebar.subheader("Parâmetros (Sensibilidade)")
@@ -560,4 +808,22 @@ elif page_selection == "🔬 Análise de Sensibilidade":
 
 else:
     # Renderiza as páginas que não têm controles na sidebar
-    page_options[page_selection]()
\ No newline at end of file
+    page_options[page_selection]()
+
+# --- Profiling: resumo do rerun na barra lateral ---
+rerun_profile = profiling.finish_rerun({"pagina": page_selection})
+if rerun_profile is not None:
+    with st.sidebar.expander(f"⏱️ Profiling: {rerun_profile.total_ms:.0f} ms neste rerun", expanded=False):
+        st.caption(f"Modo '{rerun_profile.mode}' | Log: {profiling.LOG_FILE}")
+        df_profile = pd.DataFrame(rerun_profile.records)
+        if not df_profile.empty:
+            df_profile['secao'] = ["· " * level + name for level, name in zip(df_profile['nivel'], df_profile['secao'])]
+            st.dataframe(
+                df_profile[['secao', 'tipo', 'tempo_ms', 'pico_mem_mb']].rename(columns={
+                    'secao': 'Seção', 'tipo': 'Tipo', 'tempo_ms': 'Tempo (ms)', 'pico_mem_mb': 'Pico Mem. (MB)'
+                }).round(2),
+                hide_index=True,
+                use_container_width=True
+            )
+        if rerun_profile.trace:
+            st.code(rerun_profile.trace, language=None)
\ No newline at end of file
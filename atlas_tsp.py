@@ -0,0 +1,370 @@
+# Este arquivo deve ser salvo como: atlas_tsp.py
+
+import json
+import os
+import time
+
+import numpy as np
+
+import algoritmos as alg # Reutiliza o carregador de dados e a matriz de distâncias
+
+# =============================================================================
+# ATLAS DE ROTAS ÓTIMAS (TODOS OS SUBCONJUNTOS SELECIONÁVEIS)
+# =============================================================================
+# A página do TSP sempre sai e volta ao Jardim Botânico e permite escolher até
+# MAX_SELECTION dos demais pontos: um conjunto finito de subconjuntos. Como
+# todos compartilham o mesmo ponto de partida, uma única Programação Dinâmica
+# de Held-Karp sobre os subconjuntos resolve TODOS de uma vez:
+#
+#   dp[S][j] = menor caminho que sai do ponto de partida, visita exatamente S
+#              e termina em j (j em S)
+#   dp[S][j] = min_{i em S - {j}} dp[S - {j}][i] + d(i, j)
+#
+# O tour ótimo de S é min_j dp[S][j] + d(j, partida). Cada camada (|S| = k) é
+# calculada de forma vetorizada a partir da anterior.
+#
+# Os resultados ficam em arquivos .npy indexados pela máscara de bits do
+# subconjunto e são abertos com memmap: a consulta é O(1).
+# Cada build grava arquivos novos (nome com um sufixo próprio) e só então
+# troca o meta.json, que diz quais arquivos formam o atlas: sessões que
+# estão lendo (memmap) continuam com a versão anterior inteira, e um build
+# interrompido não deixa arrays novos com um meta.json antigo.
+# Se o CSV mudar mantendo os mesmos pontos, só os subconjuntos que contêm
+# pontos com coordenadas alteradas são recalculados (reconstrução incremental).
+# Os arrays têm 2^m linhas (m = pontos além da partida): acima de
+# MAX_ATLAS_POINTS o atlas não é construído e o app usa os solvers.
+
+MAX_SELECTION = 9
+MAX_ATLAS_POINTS = 20 # 2^20 x 20 float64 = 168 MB no build; 2^25 já passaria de 6 GB
+ATLAS_DIR = os.path.join('cache', 'atlas_tsp')
+CHUNK_SIZE = 4096 # Máscaras por bloco vetorizado (limita a memória do build)
+ATLAS_ARRAYS = ('dp', 'parent', 'costs', 'tours')
+
+
+def fits_atlas(n_points):
+    """O catálogo (incluindo a partida) cabe no atlas?"""
+    return n_points - 1 <= MAX_ATLAS_POINTS
+
+
+def _array_path(atlas_dir, meta, name):
+    """Arquivo do array 'name' na versão descrita por 'meta'."""
+    return os.path.join(atlas_dir, meta.get('files', {}).get(name, f'{name}.npy'))
+
+
+def _read_meta(atlas_dir):
+    with open(os.path.join(atlas_dir, 'meta.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _popcounts(m):
+    """Número de bits ligados de cada máscara em [0, 2^m)."""
+    masks = np.arange(1 << m, dtype=np.int64)
+    counts = np.zeros(1 << m, dtype=np.int8)
+    for bit in range(m):
+        counts += ((masks >> bit) & 1).astype(np.int8)
+    return counts
+
+
+def _run_held_karp(dist_matrix, max_selection, dp, parent, changed_bits):
+    """
+    Preenche 'dp' e 'parent' (shape 2^m x m) para todos os subconjuntos de
+    tamanho até 'max_selection' que contêm algum bit de 'changed_bits'.
+    Os demais já estão corretos (vindos de um build anterior).
+    """
+    m = len(dist_matrix) - 1
+    bits = np.int64(1) << np.arange(m, dtype=np.int64)
+    counts = _popcounts(m)
+    # arc_cost[j, i] = d(i, j) entre pontos (sem o ponto de partida)
+    arc_cost = np.asarray(dist_matrix)[1:, 1:].T
+
+    # Camada 1: caminho direto do ponto de partida
+    for j in range(m):
+        if bits[j] & changed_bits:
+            dp[bits[j]] = np.inf
+            dp[bits[j], j] = dist_matrix[0][j + 1]
+            parent[bits[j]] = -1
+
+    for k in range(2, max_selection + 1):
+        masks = np.nonzero(counts == k)[0]
+        masks = masks[(masks & changed_bits) != 0]
+        for start in range(0, len(masks), CHUNK_SIZE):
+            chunk = masks[start:start + CHUNK_SIZE]
+            prev = chunk[:, None] ^ bits[None, :]                 # S - {j}
+            has_j = (chunk[:, None] & bits[None, :]) != 0
+            candidates = dp[prev] + arc_cost[None, :, :]          # [S, j, i]
+            best_i = np.argmin(candidates, axis=2)
+            best = np.take_along_axis(candidates, best_i[:, :, None], axis=2)[:, :, 0]
+            best[~has_j] = np.inf
+            best_i[~has_j] = -1
+            dp[chunk] = best
+            parent[chunk] = best_i
+
+
+def _extract_tours(dist_matrix, max_selection, dp, parent, costs, tours, changed_bits):
+    """Fecha os tours (volta ao ponto de partida) e reconstrói a ordem de visita."""
+    m = len(dist_matrix) - 1
+    bits = np.int64(1) << np.arange(m, dtype=np.int64)
+    counts = _popcounts(m)
+    dist_matrix = np.asarray(dist_matrix)
+    return_cost = dist_matrix[1:, 0]
+
+    for k in range(2, max_selection + 1):
+        masks = np.nonzero(counts == k)[0]
+        masks = masks[(masks & changed_bits) != 0]
+        if not len(masks):
+            continue
+        last = np.argmin(dp[masks] + return_cost[None, :], axis=1)
+
+        order = np.empty((len(masks), k), dtype=np.int64)
+        current_mask, current = masks.copy(), last
+        for step in range(k - 1, -1, -1):
+            order[:, step] = current
+            previous = parent[current_mask, current].astype(np.int64)
+            current_mask = current_mask ^ bits[current]
+            current = previous
+
+        tours[masks] = -1
+        tours[masks, :k] = order
+        # Custo exato em float64, somando as arestas na ordem do tour
+        closed = np.column_stack((np.zeros(len(masks), dtype=np.int64), order + 1))
+        costs[masks] = alg.evaluate_tours(dist_matrix, closed, closed=True)["distance"]
+
+
+def _atlas_nodes(store, start_node_id):
+    """Ponto de partida seguido dos demais pontos, na ordem do catálogo."""
+    start = store.row_for_id(start_node_id)
+    others = [row for row in store.rows() if row['id'] != start_node_id]
+    return [start] + others
+
+
+def _node_signature(nodes):
+    return [[int(node['id']), float(node['latitude']), float(node['longitude'])] for node in nodes]
+
+
+def _remap_atlas(old_arrays, bit_map, m, max_selection):
+    """
+    Leva os resultados de um build anterior para a nova numeração de bits.
+    'bit_map' mapeia bit antigo -> bit novo dos pontos que continuam iguais;
+    subconjuntos com algum ponto removido ou alterado são descartados.
+    """
+    dp_old, parent_old, costs_old, tours_old = old_arrays
+    old_m = dp_old.shape[1]
+    old_masks = np.arange(1 << old_m, dtype=np.int64)
+    kept_bits = sum(1 << old_bit for old_bit in bit_map)
+    valid = (old_masks & ~np.int64(kept_bits)) == 0
+    new_masks = np.zeros(1 << old_m, dtype=np.int64)
+    for old_bit, new_bit in bit_map.items():
+        new_masks |= ((old_masks >> old_bit) & 1) << new_bit
+    old_masks, new_masks = old_masks[valid], new_masks[valid]
+
+    # Índices de ponto guardados em 'parent' e 'tours' (-1 = vazio)
+    relabel = np.full(old_m + 1, -1, dtype=np.int64)
+    for old_bit, new_bit in bit_map.items():
+        relabel[old_bit + 1] = new_bit
+    old_cols, new_cols = list(bit_map), list(bit_map.values())
+
+    dp = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int8)
+    costs = np.full(1 << m, np.nan)
+    tours = np.full((1 << m, max_selection), -1, dtype=np.int8)
+    dp_rows = np.full((len(old_masks), m), np.inf)
+    dp_rows[:, new_cols] = dp_old[old_masks][:, old_cols]
+    dp[new_masks] = dp_rows
+    parent_rows = np.full((len(old_masks), m), -1, dtype=np.int8)
+    parent_rows[:, new_cols] = relabel[parent_old[old_masks][:, old_cols].astype(np.int64) + 1]
+    parent[new_masks] = parent_rows
+    costs[new_masks] = costs_old[old_masks]
+    tours[new_masks] = relabel[tours_old[old_masks].astype(np.int64) + 1]
+    return dp, parent, costs, tours
+
+
+def build_atlas(store, start_node_id=1, max_selection=MAX_SELECTION, atlas_dir=ATLAS_DIR,
+                dist_matrix_full=None, fingerprint=None):
+    """
+    Constrói (ou atualiza incrementalmente) o atlas em 'atlas_dir'. Se
+    'dist_matrix_full' (na ordem do POIStore) for informada, as distâncias
+    vêm dela em vez de serem recalculadas.
+    Retorna um dicionário com o número de subconjuntos recalculados e o tempo.
+    """
+    start_time = time.time()
+    if not fits_atlas(len(store)):
+        raise ValueError(f"Atlas limitado a {MAX_ATLAS_POINTS} pontos além da partida; o catálogo tem {len(store) - 1}.")
+    nodes = _atlas_nodes(store, start_node_id)
+    signature = _node_signature(nodes)
+    m = len(nodes) - 1
+    if dist_matrix_full is not None:
+        rows = [node.row for node in nodes]
+        dist_matrix = np.asarray(dist_matrix_full)[np.ix_(rows, rows)]
+    else:
+        dist_matrix = alg.calculate_distance_matrix(nodes)
+
+    meta_path = os.path.join(atlas_dir, 'meta.json')
+    old_meta = _read_meta(atlas_dir) if os.path.exists(meta_path) else None
+
+    # Reaproveita o build anterior se a partida é a mesma: só os subconjuntos
+    # com pontos novos ou com coordenadas alteradas são recalculados, e os
+    # que tinham pontos removidos somem
+    reusable = (
+        old_meta is not None
+        and old_meta['max_selection'] == max_selection
+        and old_meta['nodes'][0] == signature[0]
+    )
+    if reusable:
+        old_bits = {row[0]: (bit, row) for bit, row in enumerate(old_meta['nodes'][1:])}
+        changed_bits, bit_map = 0, {}
+        for bit, row in enumerate(signature[1:]):
+            old = old_bits.get(row[0])
+            if old is None or old[1] != row:
+                changed_bits |= 1 << bit
+            else:
+                bit_map[old[0]] = bit
+        old_arrays = tuple(np.load(_array_path(atlas_dir, old_meta, name)) for name in ATLAS_ARRAYS)
+        old_arrays = (old_arrays[0].astype(np.float64),) + old_arrays[1:]
+        remapped = not (len(old_bits) == m and all(old_bit == bit for old_bit, bit in bit_map.items()))
+        if remapped:
+            dp, parent, costs, tours = _remap_atlas(old_arrays, bit_map, m, max_selection)
+        else:
+            dp, parent, costs, tours = old_arrays
+    else:
+        remapped = False
+        changed_bits = (1 << m) - 1
+        dp = np.full((1 << m, m), np.inf)
+        parent = np.full((1 << m, m), -1, dtype=np.int8)
+        costs = np.full(1 << m, np.nan)
+        tours = np.full((1 << m, max_selection), -1, dtype=np.int8)
+
+    if changed_bits:
+        _run_held_karp(dist_matrix, max_selection, dp, parent, changed_bits)
+        _extract_tours(dist_matrix, max_selection, dp, parent, costs, tours, changed_bits)
+
+    counts = _popcounts(m)
+    affected = int(np.count_nonzero((counts >= 2) & (counts <= max_selection)
+                                    & ((np.arange(1 << m) & changed_bits) != 0)))
+
+    os.makedirs(atlas_dir, exist_ok=True)
+    old_files = {name: _array_path(atlas_dir, old_meta, name) for name in ATLAS_ARRAYS} if old_meta else {}
+    if changed_bits or remapped or not old_meta:
+        # Arquivos novos (sufixo próprio); dp só serve para reconstruções
+        # incrementais: float32 basta
+        version = os.urandom(4).hex()
+        files = {name: f'{name}.{version}.npy' for name in ATLAS_ARRAYS}
+        arrays = {'dp': dp.astype(np.float32), 'parent': parent, 'costs': costs, 'tours': tours}
+        for name in ATLAS_ARRAYS:
+            alg.write_atomic(os.path.join(atlas_dir, files[name]), lambda f, array=arrays[name]: np.save(f, array))
+    else:
+        files = {name: os.path.basename(path) for name, path in old_files.items()}
+    meta = {
+        'fingerprint': fingerprint or alg.dataset_fingerprint(),
+        'start_node_id': start_node_id,
+        'max_selection': max_selection,
+        'nodes': signature,
+        'files': files,
+    }
+    # O meta.json por último: só agora a nova versão passa a valer
+    alg.write_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+    for name, path in old_files.items():
+        if os.path.basename(path) != files[name] and os.path.exists(path):
+            try:
+                os.remove(path) # Quem ainda tem o memmap aberto continua lendo (POSIX)
+            except OSError:
+                pass # Windows: arquivo em uso; fica para o próximo build
+
+    return {"subsets_solved": affected, "time": time.time() - start_time}
+
+
+class TSPAtlas:
+    """Atlas aberto com memmap: consulta O(1) pela máscara do subconjunto."""
+
+    def __init__(self, atlas_dir=ATLAS_DIR):
+        # Um rebuild pode apagar os arquivos entre a leitura do meta.json e a
+        # abertura deles: nesse caso, relê o meta.json (já da versão nova)
+        for attempt in range(3):
+            meta = _read_meta(atlas_dir)
+            try:
+                self.costs = np.load(_array_path(atlas_dir, meta, 'costs'), mmap_mode='r')
+                self.tours = np.load(_array_path(atlas_dir, meta, 'tours'), mmap_mode='r')
+                break
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+        self.fingerprint = meta['fingerprint']
+        self.max_selection = meta['max_selection']
+        self.start_node_id = meta['start_node_id']
+        self.node_ids = [row[0] for row in meta['nodes']]
+        self.id_to_bit = {node_id: bit for bit, node_id in enumerate(self.node_ids[1:])}
+        self.size = int(np.count_nonzero(~np.isnan(self.costs)))
+
+    def lookup(self, selected_ids):
+        """
+        Tour ótimo (lista de IDs, saindo e voltando ao ponto de partida) e seu
+        custo para os pontos 'selected_ids', ou None fora do atlas.
+        """
+        if not 2 <= len(selected_ids) <= self.max_selection:
+            return None
+        mask = 0
+        for node_id in selected_ids:
+            if node_id not in self.id_to_bit:
+                return None
+            mask |= 1 << self.id_to_bit[node_id]
+        tour = [self.node_ids[bit + 1] for bit in self.tours[mask] if bit >= 0]
+        return [self.start_node_id] + tour + [self.start_node_id], float(self.costs[mask])
+
+
+def run_tsp_from_atlas(atlas, experiment_name, nodes_data):
+    """
+    Responde ao TSP de 'nodes_data' (partida em nodes_data[0]) pelo atlas, no
+    mesmo formato de 'alg.run_tsp_experiment'. Retorna None fora do atlas
+    (ou se 'atlas' é None).
+    """
+    start_time = time.time()
+    if atlas is None or not nodes_data or nodes_data[0]['id'] != atlas.start_node_id:
+        return None
+    found = atlas.lookup([node['id'] for node in nodes_data[1:]])
+    if found is None:
+        return None
+    tour_ids, cost = found
+    id_to_idx = {node['id']: i for i, node in enumerate(nodes_data)}
+    path = [id_to_idx[node_id] for node_id in tour_ids]
+    lookup_time = time.time() - start_time
+
+    # O "Cenário Atual" continua sendo o Vizinho Mais Próximo
+    heuristic_cost, heuristic_path = alg._calculate_heuristic_upper_bound(alg.calculate_distance_matrix(nodes_data))
+    return {
+        "name": experiment_name,
+        "cost": cost,
+        "path": path,
+        "path_names": " -> ".join(nodes_data[idx]['nome'] for idx in path),
+        "heuristic_cost": heuristic_cost,
+        "heuristic_path": heuristic_path,
+        "time": lookup_time,
+        "atlas_size": atlas.size,
+    }
+
+
+def load_or_build_atlas(store, start_node_id=1, atlas_dir=ATLAS_DIR, dist_matrix_full=None, fingerprint=None):
+    """
+    Abre o atlas, reconstruindo (de forma incremental quando possível) se a
+    impressão digital do CSV mudou ou se ele ainda não existe. Retorna None
+    se o catálogo passa de MAX_ATLAS_POINTS (o app recorre aos solvers).
+    """
+    if not fits_atlas(len(store)):
+        return None
+    fingerprint = fingerprint or alg.dataset_fingerprint()
+    meta_path = os.path.join(atlas_dir, 'meta.json')
+    fresh = False
+    if os.path.exists(meta_path):
+        meta = _read_meta(atlas_dir)
+        fresh = meta['fingerprint'] == fingerprint and meta['start_node_id'] == start_node_id
+    if not fresh:
+        build_atlas(store, start_node_id, atlas_dir=atlas_dir, dist_matrix_full=dist_matrix_full, fingerprint=fingerprint)
+    return TSPAtlas(atlas_dir)
+
+
+if __name__ == '__main__':
+    # Build offline (pode ser rodado antes de subir o app)
+    df, store, dist_matrix_full = alg.load_poi_store()
+    if df is not None:
+        info = build_atlas(store)
+        print(f"Atlas: {info['subsets_solved']} subconjuntos resolvidos em {info['time']:.2f} s.")
+    else:
+        print("Erro ao carregar dados.")
@@ -0,0 +1,168 @@
+# Este arquivo deve ser salvo como: atualizacao_dados.py
+
+import os
+import time
+
+import numpy as np
+from haversine import haversine, Unit
+
+import algoritmos as alg # Reutiliza o carregador em streaming e o armazenamento colunar
+
+# =============================================================================
+# ATUALIZAÇÃO INCREMENTAL QUANDO O CSV MUDA
+# =============================================================================
+# A última versão carregada fica salva em SNAPSHOT_FILE: IDs, atributos usados
+# pelos solvers e a matriz de distâncias. Quando o CSV muda, as duas versões
+# são comparadas por ID:
+#   * added   -> IDs novos
+#   * removed -> IDs que sumiram
+#   * moved   -> coordenadas alteradas
+#   * edited  -> tempo de visita, custo ou popularidade alterados (mesmo lugar)
+# Só as linhas e colunas da matriz dos pontos novos ou movidos são calculadas
+# (O(k·n) chamadas de haversine); o restante é copiado da versão anterior.
+# O diff resultante também diz quais resultados em cache (tabela de orçamento,
+# atlas do TSP, última rota da sessão) precisam ser recalculados.
+
+SNAPSHOT_FILE = os.path.join('cache', 'dataset_snapshot.npz')
+COORD_COLUMNS = ('latitude', 'longitude')
+SOLVER_COLUMNS = ('tempo_visita_min', 'custo_entrada', 'popularidade')
+
+
+def dataset_version(csv_files=alg.CSV_FILE):
+    """Versão barata (data de modificação e tamanho) para usar como chave de cache."""
+    if isinstance(csv_files, str):
+        csv_files = [csv_files]
+    version = []
+    for path in csv_files:
+        stat = os.stat(path) if os.path.exists(path) else None
+        version.append((path, stat and stat.st_mtime_ns, stat and stat.st_size))
+    return tuple(version)
+
+
+def diff_datasets(old_ids, old_columns, store):
+    """
+    Compara a versão anterior (IDs e colunas, alinhados) com 'store'.
+    Retorna um dicionário com as listas de IDs 'added', 'removed', 'moved'
+    e 'edited'.
+    """
+    old_row = {int(node_id): row for row, node_id in enumerate(old_ids)}
+    new_ids = store.ids.tolist()
+    common = [node_id for node_id in new_ids if node_id in old_row]
+    old_idx = np.array([old_row[node_id] for node_id in common], dtype=np.int64)
+    new_idx = np.array(store.indices_for_ids(common), dtype=np.int64)
+
+    moved = np.zeros(len(common), dtype=bool)
+    for key in COORD_COLUMNS:
+        moved |= old_columns[key][old_idx] != store.column(key)[new_idx]
+    edited = np.zeros(len(common), dtype=bool)
+    for key in SOLVER_COLUMNS:
+        edited |= old_columns[key][old_idx] != store.column(key)[new_idx]
+
+    return {
+        "added": [node_id for node_id in new_ids if node_id not in old_row],
+        "removed": [int(node_id) for node_id in old_ids if int(node_id) not in store.id_to_row],
+        "moved": [node_id for node_id, flag in zip(common, moved) if flag],
+        "edited": [node_id for node_id, flag, was_moved in zip(common, edited, moved) if flag and not was_moved],
+    }
+
+
+def changed_ids(diff):
+    """Todos os IDs afetados por um diff (novos, removidos, movidos ou editados)."""
+    return set(diff["added"]) | set(diff["removed"]) | set(diff["moved"]) | set(diff["edited"])
+
+
+def update_distance_matrix(old_ids, old_dist, store, diff):
+    """
+    Matriz de distâncias da nova versão a partir da anterior: copia o bloco
+    dos pontos que não mudaram de lugar e calcula só as linhas/colunas dos
+    pontos novos ou movidos (mesma fórmula de 'calculate_distance_matrix').
+    """
+    n = len(store)
+    old_row = {int(node_id): row for row, node_id in enumerate(old_ids)}
+    moved = set(diff["moved"])
+    new_ids = store.ids.tolist()
+
+    stable_new = [row for row, node_id in enumerate(new_ids) if node_id in old_row and node_id not in moved]
+    stable_old = [old_row[new_ids[row]] for row in stable_new]
+    dist_matrix = np.zeros((n, n))
+    dist_matrix[np.ix_(stable_new, stable_new)] = np.asarray(old_dist)[np.ix_(stable_old, stable_old)]
+
+    locations = list(zip(store.column('latitude').tolist(), store.column('longitude').tolist()))
+    for i in store.indices_for_ids(diff["added"] + diff["moved"]):
+        for j in range(n):
+            if i != j:
+                dist_matrix[i][j] = haversine(locations[i], locations[j], unit=Unit.KILOMETERS)
+                dist_matrix[j][i] = haversine(locations[j], locations[i], unit=Unit.KILOMETERS)
+    return dist_matrix
+
+
+def _load_snapshot(snapshot_file):
+    if not os.path.exists(snapshot_file):
+        return None
+    with np.load(snapshot_file) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _save_snapshot(snapshot_file, store, dist_matrix, fingerprint):
+    os.makedirs(os.path.dirname(snapshot_file) or '.', exist_ok=True)
+    columns = {key: store.column(key) for key in COORD_COLUMNS + SOLVER_COLUMNS}
+    # Temporário + os.replace: outra sessão nunca lê um snapshot pela metade
+    alg.write_atomic(snapshot_file, lambda f: np.savez(f, ids=store.ids, dist=dist_matrix,
+                                                       fingerprint=np.array(fingerprint), **columns))
+
+
+def load_with_diff(csv_files=alg.CSV_FILE, snapshot_file=SNAPSHOT_FILE):
+    """
+    Carrega o(s) CSV(s) reaproveitando a matriz de distâncias da última versão
+    carregada. Retorna o DataFrame, o POIStore, a matriz de distâncias e o
+    diff em relação à versão anterior, com as chaves extras:
+      * "fingerprint" / "old_fingerprint": impressões digitais das versões
+        (old_fingerprint é None na primeira carga)
+      * "full": True se a matriz foi calculada do zero
+      * "time": tempo da atualização da matriz (s)
+    """
+    try:
+        store, _ = alg.stream_poi_store(csv_files)
+        fingerprint = alg.dataset_fingerprint(csv_files)
+        snapshot = _load_snapshot(snapshot_file)
+
+        start_time = time.time()
+        if snapshot is None:
+            diff = {"added": store.ids.tolist(), "removed": [], "moved": [], "edited": []}
+            dist_matrix = alg.calculate_distance_matrix(store.rows())
+        elif str(snapshot['fingerprint']) == fingerprint:
+            diff = {"added": [], "removed": [], "moved": [], "edited": []}
+            dist_matrix = snapshot['dist']
+        else:
+            diff = diff_datasets(snapshot['ids'], snapshot, store)
+            dist_matrix = update_distance_matrix(snapshot['ids'], snapshot['dist'], store, diff)
+        diff.update({
+            "fingerprint": fingerprint,
+            "old_fingerprint": None if snapshot is None else str(snapshot['fingerprint']),
+            "full": snapshot is None,
+            "time": time.time() - start_time,
+        })
+
+        if snapshot is None or diff["old_fingerprint"] != fingerprint:
+            _save_snapshot(snapshot_file, store, dist_matrix, fingerprint)
+        return store.to_frame(), store, dist_matrix, diff
+
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo '{e.filename}' não encontrado.")
+        return None, None, None, None
+    except Exception as e:
+        print(f"Erro ao ler o CSV: {e}")
+        return None, None, None, None
+
+
+def is_result_stale(result_ids, result_fingerprint, diff):
+    """
+    Um resultado em cache (ex.: a última rota da sessão) calculado na versão
+    'result_fingerprint' ainda vale? Só se veio da versão imediatamente
+    anterior e não envolve nenhum ID alterado.
+    """
+    if result_fingerprint == diff["fingerprint"]:
+        return False
+    if result_fingerprint != diff["old_fingerprint"]:
+        return True
+    return bool(changed_ids(diff) & set(result_ids))
@@ -0,0 +1,61 @@
+# Este arquivo deve ser salvo como: conftest.py
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import algoritmos as alg
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(ROOT, alg.CSV_FILE)
+
+
+def build_store(n, ids=None, seed=0):
+    """POIStore sintético com 'n' pontos espalhados por Curitiba."""
+    rng = np.random.default_rng(seed)
+    ids = list(range(1, n + 1)) if ids is None else list(ids)
+    return alg.POIStore({
+        'id': np.array(ids, dtype=np.int64),
+        'nome': [f"Ponto {node_id}" for node_id in ids],
+        'categoria': rng.choice(['Parque', 'Cultural', 'Museu'], n),
+        'tempo_visita_min': rng.integers(30, 120, n),
+        'custo_entrada': rng.choice([0, 10, 15, 20], n),
+        'latitude': -25.43 + rng.uniform(-0.08, 0.08, n),
+        'longitude': -49.27 + rng.uniform(-0.08, 0.08, n),
+        'popularidade': rng.integers(50, 100, n),
+    })
+
+
+@pytest.fixture
+def make_store():
+    """Fábrica de POIStores sintéticos (n pontos, IDs opcionais)."""
+    return build_store
+
+
+def mutate_store(store, seed, start_node_id=1):
+    """
+    Nova versão de 'store' com mudanças aleatórias (pontos removidos, novos,
+    movidos e editados; a partida fica igual). Retorna o POIStore novo.
+    """
+    rng = np.random.default_rng(seed)
+    df = store.to_frame()
+    others = df.index[df['id'] != start_node_id].to_numpy()
+    removed, moved, edited = np.split(rng.choice(others, 6, replace=False), [2, 4])
+    df.loc[moved, 'latitude'] += rng.uniform(-0.02, 0.02, len(moved))
+    df.loc[edited, 'popularidade'] = rng.integers(50, 150, len(edited))
+    df.loc[edited, 'custo_entrada'] = rng.choice([0, 10, 15, 20], len(edited))
+    added = build_store(3, ids=range(int(df['id'].max()) + 1, int(df['id'].max()) + 4), seed=seed + 100).to_frame()
+    df = pd.concat([df.drop(index=removed), added], ignore_index=True)
+    return alg.POIStore.from_dataframe(df)
+
+
+def interrupted_save(file, *args, **arrays):
+    """Substituto de np.save*: grava metade do arquivo (caminho ou objeto) e falha."""
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'wb') as f:
+            f.write(b"PK\x03\x04 pela metade")
+    else:
+        file.write(b"PK\x03\x04 pela metade")
+    raise OSError("disco cheio")
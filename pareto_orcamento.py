@@ -0,0 +1,307 @@
+# Este arquivo deve ser salvo como: pareto_orcamento.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import algoritmos as alg # Reutiliza o carregador de dados e a heurística gulosa
+
+# =============================================================================
+# TABELA PRÉ-CALCULADA DA ROTA POR ORÇAMENTO (GRADE DOS SLIDERS)
+# =============================================================================
+# A barra lateral só permite 1-24 h (passo 0,5 h) e R$ 0-200 (passo R$ 5),
+# ou seja, 47 x 41 combinações. Resolvemos todas de uma vez e guardamos as
+# rotas e a fronteira de Pareto (popularidade x tempo x custo) em um .npz
+# identificado pela impressão digital do CSV.
+#
+# Compartilhamento de trabalho: a decisão gulosa em um estado (prefixo da
+# rota) só depende do orçamento por meio da viabilidade dos candidatos. Para
+# cada prefixo calculamos UMA vez a lista de candidatos ordenada pelo score;
+# cada célula da grade apenas percorre essa lista até o primeiro candidato
+# viável. O resultado é idêntico ao de 'solve_budget_route_heuristic'.
+
+TIME_GRID_HOURS = np.arange(1.0, 24.0 + 0.25, 0.5)
+COST_GRID = np.arange(0, 200 + 5, 5)
+CACHE_DIR = 'cache'
+
+
+class _GreedyTrie:
+    """Árvore de prefixos da heurística gulosa, compartilhada entre células."""
+
+    def __init__(self, all_nodes, dist_matrix_full, id_to_index, start_node_id):
+        self.all_nodes = all_nodes
+        self.dist = dist_matrix_full
+        self.id_to_index = id_to_index
+        self.start = all_nodes[id_to_index[start_node_id]]
+        self.memo = {}
+
+    def _expand(self, prefix, route_time, route_cost):
+        """Candidatos do prefixo, na ordem de preferência da heurística."""
+        ranked = self.memo.get(prefix)
+        if ranked is not None:
+            return ranked
+
+        visited = set(prefix)
+        last_idx = self.id_to_index[prefix[-1]]
+        scored = []
+        for candidate in self.all_nodes:
+            if candidate['id'] in visited:
+                continue
+            candidate_idx = self.id_to_index[candidate['id']]
+            travel_time = alg.calculate_travel_time(self.dist[last_idx][candidate_idx], alg.AVG_SPEED_KMH)
+            visit_time = candidate['tempo_visita_min']
+            score = candidate['popularidade'] / (travel_time + visit_time + 1)
+            scored.append((score, route_time + travel_time + visit_time,
+                           route_cost + candidate['custo_entrada'], candidate))
+
+        # sort é estável: empates ficam na ordem de 'all_nodes', como no guloso
+        scored.sort(key=lambda item: -item[0])
+        ranked = [(t, c, node) for _, t, c, node in scored]
+        self.memo[prefix] = ranked
+        return ranked
+
+    def solve(self, max_time_min, max_cost):
+        """Retorna (ids da rota, tempo, custo, popularidade) para um orçamento."""
+        start = self.start
+        if start['tempo_visita_min'] > max_time_min or start['custo_entrada'] > max_cost:
+            return [], 0.0, 0.0, 0.0
+
+        prefix = (start['id'],)
+        route_time = start['tempo_visita_min']
+        route_cost = start['custo_entrada']
+        popularity = start['popularidade']
+        while True:
+            for t, c, node in self._expand(prefix, route_time, route_cost):
+                if t <= max_time_min and c <= max_cost:
+                    prefix += (node['id'],)
+                    route_time, route_cost = t, c
+                    popularity += node['popularidade']
+                    break
+            else:
+                return list(prefix), route_time, route_cost, popularity
+
+    def still_greedy(self, route_ids, max_time_min, max_cost, candidate_ids):
+        """
+        A rota 'route_ids' (que não contém nenhum de 'candidate_ids') continua
+        sendo a escolha gulosa se os 'candidate_ids' forem novos/alterados?
+        Refaz o percurso comparando, a cada passo, o escolhido com cada
+        candidato viável; empate conta como mudança (conservador).
+        """
+        if not route_ids:
+            return True
+        route_time = self.start['tempo_visita_min']
+        route_cost = self.start['custo_entrada']
+        candidates = [self.all_nodes[self.id_to_index[node_id]] for node_id in candidate_ids]
+        for step, last_id in enumerate(route_ids):
+            last_idx = self.id_to_index[last_id]
+            chosen_score, chosen = None, None
+            if step + 1 < len(route_ids):
+                chosen = self.all_nodes[self.id_to_index[route_ids[step + 1]]]
+                travel_time = alg.calculate_travel_time(self.dist[last_idx][self.id_to_index[chosen['id']]], alg.AVG_SPEED_KMH)
+                chosen_score = chosen['popularidade'] / (travel_time + chosen['tempo_visita_min'] + 1)
+            for candidate in candidates:
+                travel_time = alg.calculate_travel_time(self.dist[last_idx][self.id_to_index[candidate['id']]], alg.AVG_SPEED_KMH)
+                feasible = (route_time + travel_time + candidate['tempo_visita_min'] <= max_time_min
+                            and route_cost + candidate['custo_entrada'] <= max_cost)
+                score = candidate['popularidade'] / (travel_time + candidate['tempo_visita_min'] + 1)
+                if feasible and (chosen is None or score >= chosen_score):
+                    return False
+            if chosen is not None:
+                # Mesma ordem das somas de '_expand' (resultado idêntico em ponto flutuante)
+                travel_time = alg.calculate_travel_time(self.dist[last_idx][self.id_to_index[chosen['id']]], alg.AVG_SPEED_KMH)
+                route_time = route_time + travel_time + chosen['tempo_visita_min']
+                route_cost = route_cost + chosen['custo_entrada']
+        return True
+
+
+def _solve_cost_columns(args):
+    """Resolve todas as horas para um bloco de custos (executado em processo)."""
+    all_nodes, dist_matrix_full, id_to_index, start_node_id, cost_values = args
+    trie = _GreedyTrie(all_nodes, dist_matrix_full, id_to_index, start_node_id)
+    columns = []
+    for max_cost in cost_values:
+        columns.append([trie.solve(hours * 60, max_cost) for hours in TIME_GRID_HOURS])
+    return columns
+
+
+def pareto_frontier(popularity, time_used, cost_used):
+    """
+    Índices dos pontos não dominados (maior popularidade, menor tempo,
+    menor custo). Entradas são vetores 1-D do mesmo tamanho.
+    """
+    order = np.lexsort((cost_used, time_used, -popularity))
+    frontier = []
+    for i in order:
+        dominated = any(
+            popularity[j] >= popularity[i] and time_used[j] <= time_used[i] and cost_used[j] <= cost_used[i]
+            for j in frontier
+        )
+        if not dominated:
+            frontier.append(i)
+    return np.array(frontier, dtype=np.int32)
+
+
+def build_pareto_table(all_nodes, dist_matrix_full, id_to_index, start_node_id=1, max_workers=None):
+    """
+    Resolve toda a grade (TIME_GRID_HOURS x COST_GRID) e monta a tabela.
+    Os blocos de custo são distribuídos entre processos.
+    """
+    start_time = time.time()
+    max_workers = max_workers or os.cpu_count() or 1
+    chunks = [list(chunk) for chunk in np.array_split(COST_GRID, max_workers) if len(chunk)]
+    jobs = [(all_nodes, dist_matrix_full, id_to_index, start_node_id, chunk) for chunk in chunks]
+
+    if len(jobs) == 1:
+        columns = _solve_cost_columns(jobs[0])
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=alg.process_context()) as executor:
+            columns = [column for block in executor.map(_solve_cost_columns, jobs) for column in block]
+
+    table = _table_from_columns(columns)
+    table["build_time"] = time.time() - start_time
+    return table
+
+
+def _table_from_columns(columns):
+    """Monta os arrays da tabela e a fronteira a partir das células [custo][hora]."""
+    n_time, n_cost = len(TIME_GRID_HOURS), len(COST_GRID)
+    max_len = max(len(cell[0]) for column in columns for cell in column) or 1
+    routes = np.full((n_time, n_cost, max_len), -1, dtype=np.int64) # IDs do catálogo (mesmo tipo de POIStore.ids)
+    popularity = np.zeros((n_time, n_cost), dtype=np.float32)
+    time_used = np.zeros((n_time, n_cost), dtype=np.float32)
+    cost_used = np.zeros((n_time, n_cost), dtype=np.float32)
+    for j, column in enumerate(columns):
+        for i, (route_ids, t, c, p) in enumerate(column):
+            routes[i, j, :len(route_ids)] = route_ids
+            time_used[i, j], cost_used[i, j], popularity[i, j] = t, c, p
+
+    # Fronteira de Pareto sobre as rotas distintas (não vazias)
+    flat_routes = routes.reshape(n_time * n_cost, max_len)
+    _, unique_cells = np.unique(flat_routes, axis=0, return_index=True)
+    unique_cells = unique_cells[flat_routes[unique_cells, 0] >= 0]
+    frontier = unique_cells[pareto_frontier(
+        popularity.ravel()[unique_cells], time_used.ravel()[unique_cells], cost_used.ravel()[unique_cells]
+    )] if len(unique_cells) else np.array([], dtype=np.int64)
+
+    return {
+        "routes": routes,
+        "popularity": popularity,
+        "time_used": time_used,
+        "cost_used": cost_used,
+        "frontier_cells": frontier.astype(np.int32),
+    }
+
+
+def update_pareto_table(table, all_nodes, dist_matrix_full, id_to_index, diff, start_node_id=1):
+    """
+    Atualiza a tabela depois de uma mudança no CSV ('diff' de
+    atualizacao_dados). Só as células afetadas são resolvidas de novo:
+      * rotas que passam por um ponto removido, movido ou editado;
+      * rotas em que um ponto novo/alterado passaria a ser a escolha gulosa.
+    Um ponto removido que não estava na rota não muda as escolhas.
+    Retorna a nova tabela e o número de células recalculadas.
+    """
+    start_time = time.time()
+    touched = set(diff["removed"]) | set(diff["moved"]) | set(diff["edited"])
+    candidates = diff["added"] + diff["moved"] + diff["edited"]
+    if start_node_id in touched:
+        rebuilt = build_pareto_table(all_nodes, dist_matrix_full, id_to_index, start_node_id)
+        return rebuilt, rebuilt["popularity"].size
+
+    trie = _GreedyTrie(all_nodes, dist_matrix_full, id_to_index, start_node_id)
+    columns, recomputed = [], 0
+    for j, max_cost in enumerate(COST_GRID):
+        column = []
+        for i, hours in enumerate(TIME_GRID_HOURS):
+            route_ids = [int(node_id) for node_id in table["routes"][i, j] if node_id >= 0]
+            if touched.isdisjoint(route_ids) and trie.still_greedy(route_ids, hours * 60, max_cost, candidates):
+                column.append((route_ids, float(table["time_used"][i, j]), float(table["cost_used"][i, j]),
+                               float(table["popularity"][i, j])))
+            else:
+                column.append(trie.solve(hours * 60, max_cost))
+                recomputed += 1
+        columns.append(column)
+
+    updated = _table_from_columns(columns)
+    updated["build_time"] = time.time() - start_time
+    return updated, recomputed
+
+
+def table_path(fingerprint):
+    return os.path.join(CACHE_DIR, f"pareto_orcamento_{fingerprint}.npz")
+
+
+def _table_key(dataset_fingerprint, start_node_id):
+    return f"{dataset_fingerprint}_{start_node_id}_{alg.AVG_SPEED_KMH:g}"
+
+
+def _load_table(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def load_or_build_pareto_table(all_nodes, dist_matrix_full, id_to_index, start_node_id=1, max_workers=None, diff=None):
+    """
+    Carrega a tabela do disco se a impressão digital do CSV (e da velocidade
+    média) bater. Caso contrário, atualiza a tabela da versão anterior do CSV
+    ('diff' de atualizacao_dados) ou, sem ela, recalcula tudo; e salva.
+    """
+    dataset_fingerprint = diff["fingerprint"] if diff else alg.dataset_fingerprint()
+    path = table_path(_table_key(dataset_fingerprint, start_node_id))
+    if os.path.exists(path):
+        return _load_table(path)
+
+    old_path = table_path(_table_key(diff["old_fingerprint"], start_node_id)) if diff and diff["old_fingerprint"] else None
+    if old_path and os.path.exists(old_path):
+        table, _ = update_pareto_table(_load_table(old_path), all_nodes, dist_matrix_full, id_to_index, diff, start_node_id)
+    else:
+        table = build_pareto_table(all_nodes, dist_matrix_full, id_to_index, start_node_id, max_workers)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    arrays = {key: value for key, value in table.items() if key != "build_time"}
+    alg.write_atomic(path, lambda f: np.savez_compressed(f, **arrays))
+    return table
+
+
+def lookup(table, max_time_min, max_cost):
+    """
+    Consulta O(1) na tabela. Retorna (ids da rota, tempo, custo, popularidade)
+    ou None se o orçamento não estiver exatamente na grade.
+    """
+    i = (max_time_min / 60 - TIME_GRID_HOURS[0]) / 0.5
+    j = (max_cost - COST_GRID[0]) / 5
+    if not (float(i).is_integer() and float(j).is_integer()):
+        return None
+    i, j = int(i), int(j)
+    if not (0 <= i < len(TIME_GRID_HOURS) and 0 <= j < len(COST_GRID)):
+        return None
+    route_ids = [int(node_id) for node_id in table["routes"][i, j] if node_id >= 0]
+    return (route_ids, float(table["time_used"][i, j]), float(table["cost_used"][i, j]),
+            float(table["popularity"][i, j]))
+
+
+def frontier_records(table):
+    """Fronteira de Pareto como lista de dicionários (para gráficos)."""
+    n_cost = len(COST_GRID)
+    records = []
+    for cell in table["frontier_cells"]:
+        i, j = divmod(int(cell), n_cost)
+        records.append({
+            "Horas Disponíveis": float(TIME_GRID_HOURS[i]),
+            "Orçamento (R$)": int(COST_GRID[j]),
+            "Tempo Gasto (min)": float(table["time_used"][i, j]),
+            "Custo Gasto (R$)": float(table["cost_used"][i, j]),
+            "Popularidade": float(table["popularity"][i, j]),
+        })
+    return records
+
+
+if __name__ == '__main__':
+    # Etapa de pré-cálculo (pode ser rodada antes de subir o app)
+    df, all_nodes, id_to_index, dist_matrix_full = alg.load_data()
+    if df is not None:
+        table = load_or_build_pareto_table(all_nodes, dist_matrix_full, id_to_index)
+        print(f"Tabela com {table['popularity'].size} células e {len(table['frontier_cells'])} rotas na fronteira de Pareto.")
+    else:
+        print("Erro ao carregar dados.")
@@ -0,0 +1,308 @@
+# Este arquivo deve ser salvo como: planejador_multidias.py
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import algoritmos as alg # Reutiliza a matriz de distâncias e o B&B do TSP
+
+# =============================================================================
+# PLANEJADOR DE ROTEIRO DE VÁRIOS DIAS
+# =============================================================================
+# Estratégia:
+#   1. Varredura angular (sweep) em torno do ponto de partida, balanceando o
+#      tempo de visita entre os dias e respeitando os limites diários.
+#   2. Cada dia é resolvido como um TSP exato (B&B) em paralelo.
+#   3. Melhoria entre dias (mover / trocar pontos) e nova resolução apenas
+#      dos dias que mudaram.
+# O ponto de partida é tratado como a base (hotel) do turista: todo dia começa
+# e termina nele, e o tempo de visita dele não entra no orçamento diário.
+
+# Acima deste tamanho o B&B puro fica lento demais; usamos só a heurística.
+MAX_NODES_EXACT = 11
+
+
+def _insertion_delta(dist_matrix, tour, node):
+    """
+    Inserção mais barata: retorna (acréscimo de distância, posição) para
+    inserir 'node' no tour fechado 'tour' (lista de índices, sem repetir o 0).
+    """
+    best_delta, best_pos = float('inf'), 1
+    for pos in range(1, len(tour) + 1):
+        prev_node = tour[pos - 1]
+        next_node = tour[pos] if pos < len(tour) else tour[0]
+        delta = (dist_matrix[prev_node][node] + dist_matrix[node][next_node]
+                 - dist_matrix[prev_node][next_node])
+        if delta < best_delta:
+            best_delta, best_pos = delta, pos
+    return best_delta, best_pos
+
+
+def _removal_delta(dist_matrix, tour, node):
+    """Redução de distância ao retirar 'node' do tour fechado (bypass)."""
+    pos = tour.index(node)
+    prev_node = tour[pos - 1]
+    next_node = tour[pos + 1] if pos + 1 < len(tour) else tour[0]
+    return (dist_matrix[prev_node][node] + dist_matrix[node][next_node]
+            - dist_matrix[prev_node][next_node])
+
+
+def _day_columns(nodes):
+    """Tempo de visita e custo por índice; a base (índice 0) não conta no orçamento."""
+    visit_times = [0] + [node['tempo_visita_min'] for node in nodes[1:]]
+    visit_costs = [0] + [node['custo_entrada'] for node in nodes[1:]]
+    return visit_times, visit_costs
+
+
+class _DayState:
+    """Estado de um dia durante a alocação: tour aproximado e totais."""
+
+    def __init__(self):
+        self.tour = [0] # Índice 0 = ponto de partida
+        self.distance = 0.0
+        self.visit_time = 0.0
+        self.cost = 0.0
+
+    def total_time(self, avg_speed_kmh, extra_distance=0.0, extra_visit=0.0):
+        travel = alg.calculate_travel_time(self.distance + extra_distance, avg_speed_kmh)
+        return travel + self.visit_time + extra_visit
+
+
+def sweep_partition(dist_matrix, nodes, num_days, max_time_min, max_cost, avg_speed_kmh=alg.AVG_SPEED_KMH):
+    """
+    Particiona os pontos (índices 1..n-1 de 'nodes') em 'num_days' dias por
+    varredura angular em torno do ponto de partida (índice 0).
+
+    Cada dia recebe aproximadamente o mesmo tempo de visita e nunca excede
+    'max_time_min' (visita + deslocamento estimado por inserção mais barata)
+    nem 'max_cost'. Pontos que não couberem em nenhum dia são devolvidos em
+    'unassigned', priorizando manter os mais populares.
+    """
+    depot = nodes[0]
+    candidates = list(range(1, len(nodes)))
+    if not candidates:
+        return [[] for _ in range(num_days)], []
+
+    def angle(idx):
+        return math.atan2(nodes[idx]['latitude'] - depot['latitude'],
+                          nodes[idx]['longitude'] - depot['longitude'])
+
+    # Começa a varredura logo após o maior "vazio" angular, para não cortar
+    # um agrupamento de pontos ao meio.
+    candidates.sort(key=angle)
+    angles = [angle(idx) for idx in candidates]
+    gaps = [(angles[(k + 1) % len(angles)] - angles[k]) % (2 * math.pi) for k in range(len(angles))]
+    start = (gaps.index(max(gaps)) + 1) % len(candidates)
+    candidates = candidates[start:] + candidates[:start]
+
+    days = [_DayState() for _ in range(num_days)]
+
+    def fits(day, idx):
+        delta, pos = _insertion_delta(dist_matrix, day.tour, idx)
+        ok_time = day.total_time(avg_speed_kmh, delta, nodes[idx]['tempo_visita_min']) <= max_time_min
+        ok_cost = day.cost + nodes[idx]['custo_entrada'] <= max_cost
+        return ok_time and ok_cost, delta, pos
+
+    def add(day, idx, delta, pos):
+        day.tour.insert(pos, idx)
+        day.distance += delta
+        day.visit_time += nodes[idx]['tempo_visita_min']
+        day.cost += nodes[idx]['custo_entrada']
+
+    # Ponto que não cabe nem em um dia vazio (ex.: entrada acima do orçamento
+    # diário) fica de fora da varredura: não fecha dias nem entra na cota
+    unassigned = [idx for idx in candidates if not fits(_DayState(), idx)[0]]
+    impossible = set(unassigned)
+    candidates = [idx for idx in candidates if idx not in impossible]
+    target_visit = sum(nodes[idx]['tempo_visita_min'] for idx in candidates) / num_days
+
+    current = 0
+    for idx in candidates:
+        placed = False
+        while current < num_days:
+            day = days[current]
+            ok, delta, pos = fits(day, idx)
+            # Fecha o dia quando ele já atingiu a cota de tempo ou quando o
+            # ponto (que caberia em um dia vazio) não cabe mais nele.
+            if ok and day.visit_time < target_visit:
+                add(day, idx, delta, pos)
+                placed = True
+                break
+            current += 1
+        if not placed:
+            current = min(current, num_days - 1)
+            unassigned.append(idx)
+
+    # Segunda passada: tenta encaixar os que sobraram em qualquer dia,
+    # dos mais populares para os menos populares.
+    unassigned.sort(key=lambda idx: nodes[idx]['popularidade'], reverse=True)
+    still_unassigned = []
+    for idx in unassigned:
+        options = [(fits(day, idx), day) for day in days]
+        options = [(delta, pos, day) for (ok, delta, pos), day in options if ok]
+        if options:
+            delta, pos, day = min(options, key=lambda o: o[0])
+            add(day, idx, delta, pos)
+        else:
+            still_unassigned.append(idx)
+
+    return [day.tour[1:] for day in days], still_unassigned
+
+
+def _improve_between_days(dist_matrix, nodes, day_tours, max_time_min, max_cost, avg_speed_kmh, max_rounds=10):
+    """
+    Busca local entre dias: move um ponto para outro dia ou troca dois pontos
+    de dias diferentes, aceitando apenas melhorias de distância total que
+    respeitam os limites diários. Retorna o conjunto de dias alterados.
+    """
+    changed = set()
+    dist_matrix = np.asarray(dist_matrix, dtype=float)
+    visit_times, visit_costs = _day_columns(nodes)
+
+    def evaluate(tours):
+        # Avalia todos os tours candidatos de uma vez: (distância, dentro dos limites)
+        scores = alg.evaluate_tours(dist_matrix, tours, closed=True, visit_times=visit_times,
+                                    visit_costs=visit_costs, avg_speed_kmh=avg_speed_kmh)
+        return scores["distance"], (scores["total_time"] <= max_time_min) & (scores["entry_cost"] <= max_cost)
+
+    def day_ok(tour):
+        return bool(evaluate([tour])[1][0])
+
+    for _ in range(max_rounds):
+        improved = False
+        for a in range(len(day_tours)):
+            for b in range(len(day_tours)):
+                if a == b:
+                    continue
+                for node in list(day_tours[a][1:]):
+                    # --- Mover: a -> b ---
+                    gain = _removal_delta(dist_matrix, day_tours[a], node)
+                    delta, pos = _insertion_delta(dist_matrix, day_tours[b], node)
+                    if delta < gain - 1e-9:
+                        new_a = [i for i in day_tours[a] if i != node]
+                        new_b = day_tours[b][:pos] + [node] + day_tours[b][pos:]
+                        if day_ok(new_b):
+                            day_tours[a], day_tours[b] = new_a, new_b
+                            changed.update((a, b))
+                            improved = True
+                            continue
+
+                    # --- Trocar: node (a) <-> other (b) ---
+                    if b < a:
+                        continue
+                    # Todas as trocas com os pontos de b avaliadas em lote;
+                    # aplica a primeira que melhora (mesma ordem do laço)
+                    others = np.array(day_tours[b][1:], dtype=np.int64)
+                    if not len(others):
+                        continue
+                    tour_a, tour_b = np.array(day_tours[a]), np.array(day_tours[b])
+                    swaps_a = np.repeat(tour_a[None, :], len(others), axis=0)
+                    swaps_a[:, day_tours[a].index(node)] = others
+                    swaps_b = np.repeat(tour_b[None, :], len(others), axis=0)
+                    swaps_b[np.arange(len(others)), np.arange(1, len(tour_b))] = node
+                    old_dist, _ = evaluate(alg.pad_tours([day_tours[a], day_tours[b]]))
+                    dist_a, ok_a = evaluate(swaps_a)
+                    dist_b, ok_b = evaluate(swaps_b)
+                    better = np.nonzero((dist_a + dist_b < old_dist[0] + old_dist[1] - 1e-9) & ok_a & ok_b)[0]
+                    if len(better):
+                        k = int(better[0])
+                        day_tours[a], day_tours[b] = swaps_a[k].tolist(), swaps_b[k].tolist()
+                        changed.update((a, b))
+                        improved = True
+        if not improved:
+            break
+
+    return changed
+
+
+def _solve_day(args):
+    """Resolve o TSP de um dia (executado em processo separado)."""
+    name, day_nodes = args
+    if len(day_nodes) < 2:
+        return None
+    if len(day_nodes) > MAX_NODES_EXACT:
+        return alg.run_tsp_experiment(name, day_nodes, exact=False)
+    return alg.run_tsp_experiment(name, day_nodes)
+
+
+def _solve_days(jobs, max_workers):
+    """Resolve vários dias em paralelo (ou em sequência se max_workers == 1)."""
+    if max_workers == 1 or len(jobs) <= 1:
+        return [_solve_day(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=alg.process_context()) as executor:
+        return list(executor.map(_solve_day, jobs))
+
+
+def plan_multi_day_itinerary(all_nodes, start_node, num_days, max_time_min_per_day, max_cost_per_day,
+                             avg_speed_kmh=alg.AVG_SPEED_KMH, max_workers=None):
+    """
+    Divide os pontos turísticos em 'num_days' roteiros diários (ida e volta a
+    partir de 'start_node'), respeitando os limites diários de tempo (min) e
+    custo de entrada (R$). Cada dia é resolvido com o B&B em paralelo.
+
+    Retorna um dicionário com a lista de dias, os pontos não alocados e os
+    tempos de execução ("time" = relógio total, "solve_time" = soma dos B&B).
+    """
+    if num_days < 1:
+        print("Erro Multi-dias: É necessário pelo menos 1 dia.")
+        return None
+
+    start_time = time.time()
+    nodes = [start_node] + [node for node in all_nodes if node['id'] != start_node['id']]
+    dist_matrix = alg.calculate_distance_matrix(nodes)
+
+    # 1. Particionamento geográfico
+    day_members, unassigned = sweep_partition(
+        dist_matrix, nodes, num_days, max_time_min_per_day, max_cost_per_day, avg_speed_kmh
+    )
+
+    # 2. TSP de cada dia em paralelo
+    def build_jobs(day_ids):
+        return [(f"Dia {d + 1}", [nodes[0]] + [nodes[i] for i in day_tours[d][1:]]) for d in day_ids]
+
+    day_tours = [[0] + members for members in day_members]
+    results = _solve_days(build_jobs(range(num_days)), max_workers)
+
+    # Reordena os tours conforme a solução ótima de cada dia
+    for d, result in enumerate(results):
+        if result:
+            day_tours[d] = [day_tours[d][k] for k in result['path'][:-1]]
+
+    # 3. Melhoria entre dias e nova resolução dos dias alterados
+    changed = sorted(_improve_between_days(
+        dist_matrix, nodes, day_tours, max_time_min_per_day, max_cost_per_day, avg_speed_kmh
+    ))
+    if changed:
+        for d, result in zip(changed, _solve_days(build_jobs(changed), max_workers)):
+            results[d] = result
+            if result:
+                day_tours[d] = [day_tours[d][k] for k in result['path'][:-1]]
+
+    # 4. Sumário por dia (todos os dias avaliados em lote)
+    visit_times, visit_costs = _day_columns(nodes)
+    scores = alg.evaluate_tours(dist_matrix, alg.pad_tours(day_tours), closed=True, visit_times=visit_times,
+                                visit_costs=visit_costs, avg_speed_kmh=avg_speed_kmh)
+    days = []
+    for d, tour in enumerate(day_tours):
+        closed = tour + [0]
+        route = [nodes[i] for i in closed]
+        days.append({
+            "day": d + 1,
+            "route": route,
+            "path_names": " -> ".join(node['nome'] for node in route),
+            "distance_km": float(scores["distance"][d]),
+            "time_min": float(scores["total_time"][d]),
+            "cost": float(scores["entry_cost"][d]),
+            "popularity": sum(nodes[i]['popularidade'] for i in tour[1:]),
+            "solver": results[d],
+        })
+
+    end_time = time.time()
+    return {
+        "days": days,
+        "unassigned": [nodes[i] for i in unassigned],
+        "time": end_time - start_time,
+        "solve_time": sum(r['time'] for r in results if r),
+    }
@@ -0,0 +1,162 @@
+# Este arquivo deve ser salvo como: portfolio.py
+
+import os
+import queue
+import signal
+import time
+
+import algoritmos as alg
+import solver_pulp as pulp_solver
+
+# =============================================================================
+# PORTFÓLIO DE SOLVERS TSP (EXECUÇÃO CONCORRENTE)
+# =============================================================================
+# Cada solver roda em um processo separado. Modos:
+#   * MODE_ALL   -> espera todos terminarem (card de validação B&B vs PuLP).
+#   * MODE_FIRST -> o primeiro a devolver uma solução ótima vence e os
+#                   demais processos são encerrados.
+# Todos recebem como incumbente inicial a melhor solução heurística conhecida
+# (Vizinho Mais Próximo ou o tour reparado da solução anterior). O B&B também
+# publica e lê um limite superior compartilhado durante a busca; o PuLP usa o
+# incumbente como warm start e publica seu custo ao terminar.
+#
+# Os processos não são criados com fork (o servidor do Streamlit tem várias
+# threads): usamos forkserver, ou spawn onde ele não existe
+# (alg.process_context). Cada processo abre o seu próprio grupo (os.setsid),
+# e o cancelamento mata o grupo inteiro, incluindo o CBC que o PuLP roda como
+# subprocesso.
+
+MODE_ALL = "all"
+MODE_FIRST = "first"
+CANCEL_GRACE_S = 1.0 # Espera após o SIGTERM antes do SIGKILL
+
+
+def _bnb_worker(experiment_name, nodes_data, incumbent_path, previous_path_ids, shared_bound, config):
+    if previous_path_ids is not None:
+        return alg.run_tsp_experiment_incremental(experiment_name, nodes_data, previous_path_ids, shared_bound=shared_bound)
+    return alg.run_tsp_experiment(experiment_name, nodes_data, shared_bound=shared_bound)
+
+
+def _pulp_worker(experiment_name, nodes_data, incumbent_path, previous_path_ids, shared_bound, config):
+    result = pulp_solver.solve_tsp_with_pulp(experiment_name, nodes_data, initial_path=incumbent_path, config=config)
+    if result is not None:
+        with shared_bound.get_lock():
+            shared_bound.value = min(shared_bound.value, result['cost'])
+    return result
+
+
+SOLVERS = {
+    "bnb": _bnb_worker,
+    "pulp": _pulp_worker,
+}
+
+
+def _run_in_process(name, worker, args, result_queue):
+    """Ponto de entrada de cada processo: executa o solver e envia o resultado."""
+    if hasattr(os, 'setsid'):
+        os.setsid() # Grupo próprio: o cancelamento alcança os subprocessos (CBC)
+    start_time = time.time()
+    try:
+        result = worker(*args)
+    except Exception as e:
+        print(f"Erro no solver '{name}': {e}")
+        result = None
+    result_queue.put((name, result, time.time() - start_time))
+
+
+def _signal_group(process, sig):
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass # Grupo já encerrado (ou o processo ainda não chamou setsid)
+
+
+def _cancel(process):
+    """Encerra o processo e os subprocessos dele (o grupo inteiro, em POSIX)."""
+    if not hasattr(os, 'killpg'):
+        process.terminate()
+        process.join()
+        return
+    _signal_group(process, signal.SIGTERM)
+    process.terminate()
+    process.join(CANCEL_GRACE_S)
+    _signal_group(process, signal.SIGKILL)
+    if process.is_alive():
+        process.kill()
+    process.join()
+
+
+def _initial_incumbent(nodes_data, previous_path_ids):
+    """Melhor solução heurística disponível antes de lançar os solvers."""
+    dist_matrix = alg.calculate_distance_matrix(nodes_data)
+    cost, path = alg._calculate_heuristic_upper_bound(dist_matrix)
+    if previous_path_ids is not None:
+        repaired_cost, repaired_path = alg.repair_tour(dist_matrix, nodes_data, previous_path_ids)
+        if repaired_cost < cost:
+            cost, path = repaired_cost, repaired_path
+    return cost, path
+
+
+def run_tsp_portfolio(experiment_name, nodes_data, solvers=("bnb", "pulp"), mode=MODE_ALL,
+                      previous_path_ids=None, timeout=None, solver_configs=None):
+    """
+    Executa os solvers TSP de 'solvers' concorrentemente, cada um em seu
+    próprio processo. 'solver_configs' mapeia nome -> configuração do solver
+    (ex.: {"pulp": solver_pulp.SolverConfig(...)}).
+
+    Retorna um dicionário com:
+      * "results": {nome: resultado do solver (ou None)}
+      * "timings": {nome: tempo de relógio do processo (s)}
+      * "winner":  nome do primeiro solver a terminar com solução ótima
+      * "wall_time": tempo total do portfólio (s)
+    No modo MODE_FIRST, os solvers perdedores ficam fora de "results".
+    """
+    if len(nodes_data) < 2:
+        print("Erro Portfólio: Pelo menos 2 nós são necessários.")
+        return None
+
+    start_time = time.time()
+    incumbent_cost, incumbent_path = _initial_incumbent(nodes_data, previous_path_ids)
+
+    ctx = alg.process_context(('algoritmos', 'solver_pulp'))
+    shared_bound = ctx.Value('d', incumbent_cost)
+    result_queue = ctx.Queue()
+    processes = {}
+    solver_configs = solver_configs or {}
+    for name in solvers:
+        args = (experiment_name, nodes_data, incumbent_path, previous_path_ids, shared_bound, solver_configs.get(name))
+        process = ctx.Process(target=_run_in_process, args=(name, SOLVERS[name], args, result_queue), daemon=True)
+        process.start()
+        processes[name] = process
+
+    results, timings, winner = {}, {}, None
+    deadline = None if timeout is None else start_time + timeout
+    try:
+        while len(results) < len(processes):
+            remaining = None if deadline is None else max(deadline - time.time(), 0)
+            try:
+                name, result, elapsed = result_queue.get(timeout=remaining)
+            except queue.Empty:
+                print("Portfólio: tempo limite atingido.")
+                break
+            results[name] = result
+            timings[name] = elapsed
+            # Soluções viáveis paradas por limite de tempo não contam como vitória
+            if result is not None and result.get('optimal', True) and winner is None:
+                winner = name
+                if mode == MODE_FIRST:
+                    break
+    finally:
+        # Cancela quem ainda estiver rodando (perdedores ou tempo esgotado)
+        for process in processes.values():
+            if process.is_alive():
+                _cancel(process)
+            process.join()
+
+    return {
+        "results": results,
+        "timings": timings,
+        "winner": winner,
+        "wall_time": time.time() - start_time,
+        "incumbent_cost": incumbent_cost,
+    }
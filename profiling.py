@@ -0,0 +1,301 @@
+# Este arquivo deve ser salvo como: profiling.py
+
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# =============================================================================
+# MODO DE PROFILING DO APP (OPT-IN)
+# =============================================================================
+# Ativado pela variável de ambiente TURISMO_PROFILE ou pelo parâmetro de URL
+# ?profile=... . Valores aceitos:
+#   * "1" / "time"  -> tempo de cada seção + pico de memória (tracemalloc)
+#   * "cprofile"    -> o anterior + cProfile da execução inteira
+#   * "sample"      -> o anterior + amostragem periódica das pilhas
+# Desativado, 'profiled' devolve a própria função e 'section' devolve um
+# contexto vazio: nada é medido nem registrado.
+#
+# Cada execução (rerun) do Streamlit roda em uma thread; o estado fica em um
+# threading.local para não misturar sessões simultâneas. O tracemalloc é
+# global ao processo, então picos de sessões perfiladas ao mesmo tempo se
+# somam.
+
+ENV_VAR = "TURISMO_PROFILE"
+MODES = {"1": "time", "time": "time", "cprofile": "cprofile", "sample": "sample"}
+LOG_FILE = os.path.join('cache', 'profiling.log')
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUP_COUNT = 5
+SAMPLE_INTERVAL_S = 0.005
+TOP_ENTRIES = 25
+
+_local = threading.local()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_logger = None
+_NULL_SECTION = contextlib.nullcontext()
+_cache_lock = threading.Lock()
+_cache_counts = Counter()
+
+
+def resolve_mode(query_value=None):
+    """Modo de profiling a partir do parâmetro de URL (prioridade) ou do ambiente."""
+    value = query_value if query_value else os.environ.get(ENV_VAR, "")
+    return MODES.get(str(value).strip().lower())
+
+
+class _StackSampler(threading.Thread):
+    """Amostra a pilha da thread alvo em intervalos fixos (profiler estatístico)."""
+
+    def __init__(self, target_thread_id, interval=SAMPLE_INTERVAL_S):
+        super().__init__(daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            while frame is not None:
+                code = frame.f_code
+                self.counts[f"{os.path.basename(code.co_filename)}:{code.co_name}"] += 1
+                frame = frame.f_back
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def report(self):
+        lines = [f"{self.samples} amostras a cada {self.interval * 1000:.0f} ms (tempo inclusivo por função)"]
+        for name, count in self.counts.most_common(TOP_ENTRIES):
+            lines.append(f"{count / max(self.samples, 1):7.1%}  {name}")
+        return "\n".join(lines)
+
+
+class RerunProfile:
+    """Medições de uma execução (rerun) do app."""
+
+    def __init__(self, mode, context=None):
+        self.mode = mode
+        self.context = context or {}
+        self.records = []
+        self.trace = None
+        self._stack = []
+        self._start = time.perf_counter()
+        self._cprofile = None
+        self._sampler = None
+
+    def start(self):
+        _acquire_tracemalloc()
+        if self.mode == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self.mode == "sample":
+            self._sampler = _StackSampler(threading.get_ident())
+            self._sampler.start()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(TOP_ENTRIES)
+            self.trace = out.getvalue()
+        if self._sampler is not None:
+            self._sampler.stop()
+            self.trace = self._sampler.report()
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        self.records.sort(key=lambda record: record["inicio_ms"])
+        _release_tracemalloc()
+
+    @contextlib.contextmanager
+    def section(self, name, kind):
+        # O pico do pai é guardado antes de zerar o contador para o filho
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+        entry = {"baseline": current, "peak": 0}
+        self._stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._stack.pop()
+            peak = max(entry["peak"], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            self.records.append({
+                "secao": name,
+                "tipo": kind,
+                "nivel": len(self._stack),
+                "inicio_ms": (start - self._start) * 1000,
+                "tempo_ms": elapsed_ms,
+                "pico_mem_mb": max(peak - entry["baseline"], 0) / 1e6,
+            })
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _get_logger():
+    """Logger com arquivo rotativo (uma linha JSON por rerun)."""
+    global _logger
+    if _logger is None:
+        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+        logger = logging.getLogger("turismo.profiling")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES,
+                                                       backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+def start_rerun(query_value=None, context=None):
+    """
+    Início de um rerun: ativa o profiling se pedido. Retorna o RerunProfile
+    ou None (desativado).
+    """
+    # Um rerun interrompido (st.stop, exceção) não chega a 'finish_rerun'
+    stale = getattr(_local, "profile", None)
+    if stale is not None:
+        stale.stop()
+
+    mode = resolve_mode(query_value)
+    if mode is None:
+        _local.profile = None
+        return None
+    profile = RerunProfile(mode, context)
+    _local.profile = profile
+    profile.start()
+    return profile
+
+
+def finish_rerun(context=None):
+    """
+    Fim do rerun: encerra as medições e grava o registro no log. 'context'
+    (ex.: página selecionada) é acrescentado ao registro.
+    """
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.context.update(context or {})
+    profile.stop()
+    _get_logger().info(json.dumps({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "modo": profile.mode,
+        "contexto": profile.context,
+        "total_ms": profile.total_ms,
+        "secoes": profile.records,
+        "trace": profile.trace,
+    }, ensure_ascii=False, default=str))
+    return profile
+
+
+def is_enabled():
+    return getattr(_local, "profile", None) is not None
+
+
+def section(name, kind="bloco"):
+    """Context manager que mede um trecho (contexto vazio se desativado)."""
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return _NULL_SECTION
+    return profile.section(name, kind)
+
+
+def profiled(name=None, kind="função"):
+    """
+    Decorator que mede cada chamada da função. Se o profiling estiver
+    desativado no momento da decoração, devolve a função original.
+    """
+    def decorator(func):
+        if not is_enabled():
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(name or func.__name__, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# =============================================================================
+# CONTADORES DE CACHE (SEMPRE ATIVOS)
+# =============================================================================
+# Independem do modo de profiling: custam um incremento por chamada e
+# permitem medir a taxa de acerto dos caches do Streamlit (ex.: no teste de
+# carga). Os contadores são do processo, somando todas as sessões.
+
+def _count_cache(name, event):
+    with _cache_lock:
+        _cache_counts[(name, event)] += 1
+
+
+def counted_cache(cache_decorator, name=None):
+    """
+    Aplica 'cache_decorator' (st.cache_data / st.cache_resource) contando as
+    chamadas (fora do cache) e os misses (execuções reais, dentro do cache).
+    """
+    def decorator(func):
+        key = name or func.__name__
+
+        @functools.wraps(func)
+        def miss(*args, **kwargs):
+            _count_cache(key, "misses")
+            return func(*args, **kwargs)
+        cached = cache_decorator(miss)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _count_cache(key, "chamadas")
+            return cached(*args, **kwargs)
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """{função: {'chamadas', 'misses', 'hit_rate'}} acumulados neste processo."""
+    with _cache_lock:
+        counts = dict(_cache_counts)
+    stats = {}
+    for name in sorted({name for name, _ in counts}):
+        calls = counts.get((name, "chamadas"), 0)
+        misses = counts.get((name, "misses"), 0)
+        stats[name] = {"chamadas": calls, "misses": misses,
+                       "hit_rate": 1 - misses / calls if calls else None}
+    return stats
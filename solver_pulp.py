@@ -2,14 +2,118 @@
 
 import pulp
 import time
+import os
+import re
+import tempfile
 import algoritmos as alg # Reutiliza nosso carregador de dados e matriz de distância
 
-def solve_tsp_with_pulp(experiment_name, nodes_data):
+# =============================================================================
+# CONFIGURAÇÃO DO SOLVER (BACKEND, THREADS, LIMITES)
+# =============================================================================
+# Ordem de preferência do modo "AUTO": GLPK (como antes), HiGHS e CBC (que
+# vem junto com o PuLP e está sempre disponível).
+AUTO_BACKENDS = ("GLPK", "HIGHS", "CBC")
+BACKEND_SOLVERS = {
+    "CBC": "PULP_CBC_CMD",
+    "GLPK": "GLPK_CMD",
+    "HIGHS": "HiGHS_CMD",
+}
+
+class SolverConfig:
+    """
+    Parâmetros do solver MIP.
+      * backend: "AUTO", "CBC", "GLPK" ou "HIGHS"
+      * threads: número de threads (None = todos os núcleos; GLPK ignora)
+      * time_limit: limite de tempo em segundos (None = sem limite)
+      * gap_rel: gap relativo de otimalidade aceito (0.0 = ótimo exato)
+      * presolve: liga/desliga o pré-processamento do solver
+      * msg: mostra o log do solver no console
+    """
+    def __init__(self, backend="AUTO", threads=None, time_limit=None, gap_rel=None, presolve=True, msg=False):
+        self.backend = backend
+        self.threads = threads if threads is not None else (os.cpu_count() or 1)
+        self.time_limit = time_limit
+        self.gap_rel = gap_rel
+        self.presolve = presolve
+        self.msg = msg
+
+    def as_dict(self):
+        return {
+            "backend": self.backend,
+            "threads": self.threads,
+            "time_limit": self.time_limit,
+            "gap_rel": self.gap_rel,
+            "presolve": self.presolve,
+        }
+
+def available_backends():
+    """Backends instalados nesta máquina, na ordem de AUTO_BACKENDS."""
+    installed = set(pulp.listSolvers(onlyAvailable=True))
+    return [backend for backend in AUTO_BACKENDS if BACKEND_SOLVERS[backend] in installed]
+
+def resolve_backend(config):
+    """Escolhe o backend efetivo (o modo AUTO usa o primeiro disponível)."""
+    backends = available_backends()
+    if config.backend == "AUTO":
+        return backends[0] if backends else "CBC"
+    if config.backend not in backends:
+        print(f"Backend '{config.backend}' não encontrado, usando o solver padrão (CBC).")
+        return "CBC"
+    return config.backend
+
+def solution_status(status, sol_status):
+    """
+    (ótima?, rótulo) da solução devolvida pelo PuLP. Quando um limite de
+    tempo/gap para o CBC em uma solução só viável, o status ainda é
+    "Optimal": quem diz se ela é ótima é o sol_status.
+    """
+    is_optimal = status == pulp.LpStatusOptimal and sol_status != pulp.LpSolutionIntegerFeasible
+    return is_optimal, ("Ótima" if is_optimal else "Viável (limite atingido)")
+
+def build_solver(config, backend, log_path, warm_start=False):
+    """Instancia o solver do PuLP com os parâmetros de 'config'."""
+    if backend == "GLPK":
+        options = [] if config.presolve else ["--nopresol"]
+        if config.gap_rel is not None:
+            options += ["--mipgap", str(config.gap_rel)]
+        return pulp.GLPK_CMD(msg=config.msg, timeLimit=config.time_limit, options=options)
+    if backend == "HIGHS":
+        options = [] if config.presolve else ["presolve=off"]
+        return pulp.HiGHS_CMD(msg=config.msg, timeLimit=config.time_limit, gapRel=config.gap_rel,
+                              threads=config.threads, logPath=log_path, warmStart=warm_start, options=options)
+    return pulp.PULP_CBC_CMD(msg=config.msg, timeLimit=config.time_limit, gapRel=config.gap_rel,
+                             threads=config.threads, presolve=config.presolve, logPath=log_path,
+                             warmStart=warm_start)
+
+def _parse_solver_log(backend, log_text):
+    """Extrai do log o número de nós do B&B e o limite inferior final."""
+    patterns = {
+        "CBC": (r"Enumerated nodes:\s+(\d+)", r"Lower bound:\s+(\S+)"),
+        "HIGHS": (r"^\s*Nodes\s+(\d+)", r"Dual bound\s+(\S+)"),
+    }
+    if backend not in patterns:
+        return None, None
+    nodes_match = re.search(patterns[backend][0], log_text, re.MULTILINE)
+    bound_match = re.search(patterns[backend][1], log_text, re.MULTILINE)
+    nodes = int(nodes_match.group(1)) if nodes_match else None
+    try:
+        bound = float(bound_match.group(1)) if bound_match else None
+    except ValueError:
+        bound = None
+    return nodes, bound
+
+DEFAULT_CONFIG = SolverConfig()
+
+def solve_tsp_with_pulp(experiment_name, nodes_data, initial_path=None, config=None):
     """
     Resolve o TSP usando Programação Linear Inteira (PuLP).
     Isto utiliza um solver que aplica Branch and Cut (B&B + Cutting Plane).
     
     Usamos a formulação Miller-Tucker-Zemlin (MTZ) para eliminar sub-rotas.
+
+    'initial_path' (opcional) é um tour conhecido (índices de 'nodes_data',
+    fechado em 0) usado como solução inicial (warm start) pelo CBC/HiGHS.
+    'config' (SolverConfig) define backend, threads, limite de tempo e gap.
     """
     
     print(f"\n--- Iniciando Solver PuLP (Branch & Cut) para: {experiment_name} ---")
@@ -17,6 +121,9 @@ def solve_tsp_with_pulp(experiment_name, nodes_data):
     if len(nodes_data) < 2:
         return None
 
+    config = config or DEFAULT_CONFIG
+    model_start_time = time.time()
+
     # 1. Preparar dados
     n = len(nodes_data)
     index_to_name = {i: node['nome'] for i, node in enumerate(nodes_data)}
@@ -60,24 +167,42 @@ def solve_tsp_with_pulp(experiment_name, nodes_data):
             if i != j:
                 prob += u[i] - u[j] + n * x[i][j] <= n - 1
 
+    # --- c. Solução Inicial (Warm Start) ---
+    if initial_path is not None:
+        edges = set(zip(initial_path[:-1], initial_path[1:]))
+        for i in range(n):
+            for j in range(n):
+                x[i][j].setInitialValue(1 if (i, j) in edges else 0)
+        for position, node in enumerate(initial_path[:-1]):
+            u[node].setInitialValue(max(position, 1))
+
     # 3. Executar o Solver
-    print("Iniciando o solver... (Isso pode levar alguns segundos/minutos)")
+    backend = resolve_backend(config)
+    print(f"Iniciando o solver {backend}... (Isso pode levar alguns segundos/minutos)")
+    log_fd, log_path = tempfile.mkstemp(suffix=".log")
+    os.close(log_fd)
     start_time = time.time()
-    
-    # status = prob.solve() # Usa o solver padrão (CBC)
-    # Para problemas de TSP, o solver GLPK pode ser mais rápido se instalado
-    # Tenta usar GLPK, se não, usa o padrão CBC
+    model_time = start_time - model_start_time
+
     try:
-        status = prob.solve(pulp.GLPK_CMD(msg=0))
+        status = prob.solve(build_solver(config, backend, log_path, warm_start=initial_path is not None))
     except pulp.apis.core.PulpSolverError:
-        print("GLPK não encontrado, usando o solver padrão (CBC).")
-        status = prob.solve()
+        print(f"Falha no solver {backend}, usando o solver padrão (CBC).")
+        backend = "CBC"
+        status = prob.solve(build_solver(config, backend, log_path, warm_start=initial_path is not None))
         
     end_time = time.time()
-    
-    if status != pulp.LpStatusOptimal:
+
+    with open(log_path, encoding="utf-8", errors="replace") as log_file:
+        solver_nodes, best_bound = _parse_solver_log(backend, log_file.read())
+    os.remove(log_path)
+
+    # Com limite de tempo/gap o solver pode parar com uma solução viável não ótima
+    has_solution = prob.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+    if status != pulp.LpStatusOptimal and not has_solution:
         print("!!! O Solver não encontrou uma solução ótima !!!")
         return None
+    is_optimal, status_label = solution_status(status, prob.sol_status)
 
     # 4. Recuperar a Solução
     path = [0]
@@ -85,7 +210,7 @@ def solve_tsp_with_pulp(experiment_name, nodes_data):
     while len(path) < n:
         for j in range(n):
             # Encontra o próximo nó j para onde x_ij é 1
-            if j != current_node and pulp.value(x[current_node][j]) == 1:
+            if j != current_node and pulp.value(x[current_node][j]) > 0.5:
                 path.append(j)
                 current_node = j
                 break
@@ -94,14 +219,21 @@ def solve_tsp_with_pulp(experiment_name, nodes_data):
     # 5. Formatar Resultados
     results = {
         "name": f"{experiment_name} (PuLP)",
-        "cost": pulp.value(prob.objective),
+        "cost": float(alg.evaluate_tours(dist_matrix, [path])["distance"][0]), # Do caminho, sem a tolerância do solver
         "path": path,
         "path_names": " -> ".join([index_to_name[idx] for idx in path]),
         "time": end_time - start_time,
-        "solver_status": pulp.LpStatus[status]
+        "solver_status": status_label,
+        "optimal": is_optimal,
+        "backend": backend,
+        "config": config.as_dict(),
+        "model_time": model_time,
+        "solver_time": prob.solutionTime,
+        "nodes": solver_nodes,
+        "best_bound": best_bound if best_bound is not None else (pulp.value(prob.objective) if is_optimal else None)
     }
     
-    print(f"Solução Ótima (PuLP) encontrada: {results['cost']:.2f} km")
+    print(f"Solução {status_label} (PuLP) encontrada: {results['cost']:.2f} km")
     print(f"Tempo de execução (PuLP): {results['time']:.4f} s")
     
     return results
@@ -0,0 +1,255 @@
+# Este arquivo deve ser salvo como: test_algoritmos.py
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import algoritmos as alg
+from conftest import CSV_PATH
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_incremental_confere_com_o_bnb_do_zero(make_store, seed):
+    """ Warm start + limite de complemento: mesmo ótimo, menos nós expandidos """
+    store = make_store(10, seed=seed)
+    previous_nodes = store.rows(range(8))
+    previous = alg.run_tsp_experiment("anterior", previous_nodes)
+    previous_ids = [previous_nodes[idx]['id'] for idx in previous['path']]
+
+    nodes = store.rows(range(9))
+    cold = alg.run_tsp_experiment("do zero", nodes)
+    warm = alg.run_tsp_experiment_incremental("incremental", nodes, previous_ids)
+
+    assert warm['cost'] == pytest.approx(cold['cost'])
+    assert warm['nodes'] <= cold['nodes']
+    assert warm['added_ids'] == [nodes[-1]['id']] and warm['removed_ids'] == []
+    assert sorted(warm['path'][:-1]) == list(range(9))
+
+
+def test_poistore_preserva_texto_ausente():
+    """ None/NaN voltam como None (não como "nan"); texto vazio continua vazio """
+    n = 6
+    store = alg.POIStore({
+        'id': np.arange(1, n + 1),
+        'nome': [f"Ponto {i}" for i in range(n)],
+        'categoria': ['Parque', None, 'Parque', np.nan, 'Museu', 'Parque'],
+        'horario_abertura': ['08:00', np.nan, '09:00', '', '10:00', '11:00'],
+    })
+    assert store.value('categoria', 1) is None and store.value('categoria', 3) is None
+    assert store.value('categoria', 0) == 'Parque'
+    assert store.value('horario_abertura', 1) is None
+    assert store.value('horario_abertura', 3) == ''
+    assert store.column('categoria').tolist() == ['Parque', None, 'Parque', None, 'Museu', 'Parque']
+    assert store.row(1).to_dict()['horario_abertura'] is None
+
+    frame = store.to_frame()
+    assert frame['categoria'].isna().tolist() == [False, True, False, True, False, False]
+    assert frame['horario_abertura'].isna().tolist() == [False, True, False, False, False, False]
+    assert 'nan' not in store.column('horario_abertura').tolist()
+
+
+def test_carga_em_streaming_preserva_texto_ausente(tmp_path):
+    """ Ausentes no CSV continuam ausentes, em qualquer bloco da leitura """
+    df = pd.read_csv(CSV_PATH).drop(columns=['Unnamed: 0'])
+    df.loc[[2, 9, 17], 'horario_abertura'] = np.nan
+    df.loc[[4, 11], 'acessibilidade'] = np.nan
+    csv_file = tmp_path / "pontos.csv"
+    df.to_csv(csv_file, index=False)
+
+    store, stats = alg.stream_poi_store(str(csv_file), chunksize=5)
+    assert stats["rows_kept"] == len(df)
+    frame = store.to_frame()
+    for key in ('horario_abertura', 'acessibilidade', 'nome'):
+        assert frame[key].isna().tolist() == df[key].isna().tolist()
+        assert frame[key].dropna().tolist() == df[key].dropna().tolist()
+    assert store.value('horario_abertura', 2) is None
+
+
+def _brute_force(dist):
+    n = len(dist)
+    return min(
+        dist[0][p[0]] + sum(dist[a][b] for a, b in zip(p, p[1:])) + dist[p[-1]][0]
+        for p in itertools.permutations(range(1, n))
+    )
+
+
+def _solve(dist, incumbent=None, **kwargs):
+    stats = alg.BnBStats()
+    if incumbent is not None:
+        stats.upper_bound, stats.best_path = alg._path_cost(dist, incumbent), incumbent
+    alg._solve_tsp_branch_and_bound(dist, stats, **kwargs)
+    return stats
+
+
+@pytest.mark.parametrize("symmetric", [True, False])
+@pytest.mark.parametrize("completion_bound", [False, True])
+def test_bnb_confere_com_forca_bruta(symmetric, completion_bound):
+    """ Dominância, simetria e limite de complemento não perdem o ótimo """
+    rng = np.random.default_rng(11)
+    for n in (2, 3, 5, 7):
+        dist = rng.uniform(1, 10, (n, n))
+        if symmetric:
+            dist = (dist + dist.T) / 2
+        np.fill_diagonal(dist, 0)
+        stats = _solve(dist, completion_bound=completion_bound)
+        assert stats.upper_bound == pytest.approx(_brute_force(dist))
+        assert alg._path_cost(dist, stats.best_path) == pytest.approx(stats.upper_bound)
+        assert sorted(stats.best_path[:-1]) == list(range(n))
+
+
+def test_bnb_simetria_so_com_matriz_simetrica():
+    rng = np.random.default_rng(3)
+    dist = rng.uniform(1, 10, (7, 7))
+    np.fill_diagonal(dist, 0)
+    assert _solve(dist).symmetry_pruned == 0
+    assert _solve((dist + dist.T) / 2).symmetry_pruned > 0
+
+
+def test_bnb_com_tabela_de_dominancia_pequena(make_store):
+    """ Tabela limitada descarta entradas antigas, mas o ótimo não muda """
+    dist = np.array(alg.calculate_distance_matrix(make_store(8, seed=9).rows()))
+    full = _solve(dist)
+    tiny = _solve(dist, dominance_table_size=4)
+    assert full.dominance_hits > 0 and tiny.dominance_evictions > 0
+    assert tiny.upper_bound == pytest.approx(full.upper_bound)
+    assert tiny.nodes_expanded >= full.nodes_expanded
+
+
+def test_limite_de_complemento_com_distancias_assimetricas():
+    """ Ciclo barato em um sentido e caro no outro: o limite não pode passar do ótimo """
+    n = 5
+    dist = np.full((n, n), 100.0)
+    for i in range(n):
+        dist[i][(i + 1) % n] = 1.0
+    dist[1][3] = dist[3][2] = dist[2][4] = 1.5
+    np.fill_diagonal(dist, 0)
+    # Incumbente quase ótimo (como no warm start): só um limite válido o supera
+    stats = _solve(dist, incumbent=[0, 1, 3, 2, 4, 0], completion_bound=True)
+    assert stats.upper_bound == pytest.approx(n)
+    assert stats.best_path == [0, 1, 2, 3, 4, 0]
+
+
+def _evaluate_one(dist, stops, closed, visit_times, visit_costs, opening, closing, start, speed):
+    """Avaliação escalar de referência (um tour, laço simples)."""
+    stops = [s for s in stops if s >= 0]
+    legs = [dist[a][b] for a, b in zip(stops, stops[1:])]
+    if closed and len(stops) > 1:
+        legs.append(dist[stops[-1]][stops[0]])
+    returns = len(stops) > 1 and stops[-1] == stops[0]
+    clock, visit_time, cost, violation = start, 0.0, 0.0, 0.0
+    for k, s in enumerate(stops):
+        if k:
+            clock += legs[k - 1] / speed * 60
+        if returns and k == len(stops) - 1:
+            continue
+        violation += max(opening[s] - clock, 0) + max(clock + visit_times[s] - closing[s], 0)
+        clock += visit_times[s]
+        visit_time += visit_times[s]
+        cost += visit_costs[s]
+    distance = sum(legs)
+    return distance, visit_time, cost, violation
+
+
+@pytest.mark.parametrize("closed", [False, True])
+def test_avaliacao_em_lote_confere_com_laco_escalar(closed):
+    """ Tours de tamanhos diferentes (com -1), retornos explícitos e janelas """
+    rng = np.random.default_rng(5)
+    n = 9
+    dist = rng.uniform(0.5, 8, (n, n))
+    np.fill_diagonal(dist, 0)
+    visit_times = rng.integers(20, 90, n).astype(float)
+    visit_costs = rng.choice([0.0, 10.0, 25.0], n)
+    opening = np.where(rng.random(n) < 0.3, np.nan, rng.integers(8 * 60, 11 * 60, n))
+    closing = np.where(rng.random(n) < 0.3, np.nan, rng.integers(12 * 60, 18 * 60, n))
+    paths = [[0], [0, 3], [0, 4, 2, 0], list(rng.permutation(n))] + [
+        [0] + list(rng.choice(np.arange(1, n), size, replace=False)) for size in (1, 3, 5, 8)]
+
+    scores = alg.evaluate_tours(dist, alg.pad_tours(paths), closed=closed, visit_times=visit_times,
+                                visit_costs=visit_costs, opening_min=opening, closing_min=closing, avg_speed_kmh=30.0)
+    bounds = (np.nan_to_num(opening, nan=-np.inf), np.nan_to_num(closing, nan=np.inf))
+    for k, path in enumerate(paths):
+        distance, visit_time, cost, violation = _evaluate_one(
+            dist, path, closed, visit_times, visit_costs, *bounds, alg.DAY_START_MIN, 30.0)
+        assert scores["distance"][k] == pytest.approx(distance)
+        assert scores["travel_time"][k] == pytest.approx(distance / 30.0 * 60)
+        assert scores["visit_time"][k] == pytest.approx(visit_time)
+        assert scores["total_time"][k] == pytest.approx(distance / 30.0 * 60 + visit_time)
+        assert scores["entry_cost"][k] == pytest.approx(cost)
+        assert scores["window_violation"][k] == pytest.approx(violation)
+
+
+def test_avaliacao_sem_tours_e_com_horarios_em_texto():
+    dist = np.array([[0.0, 1.0], [1.0, 0.0]])
+    empty = alg.evaluate_tours(dist, alg.pad_tours([[], []]))
+    assert empty["distance"].tolist() == [0.0, 0.0]
+    minutes = alg.parse_clock_minutes(['08:30', None, 'fechado', '18:00:00'])
+    assert minutes[0] == 510 and minutes[3] == 1080 and np.isnan(minutes[1:3]).all()
+
+
+def test_listas_de_vizinhos_e_heuristica(monkeypatch):
+    """ Listas ordenadas por distância; a heurística com lista curta = vizinho mais próximo completo """
+    rng = np.random.default_rng(8)
+    n = 12
+    dist = rng.uniform(1, 10, (n, n))
+    dist = (dist + dist.T) / 2
+    np.fill_diagonal(dist, 0)
+
+    neighbors = alg.compute_neighbor_lists(dist)
+    for i, row in enumerate(neighbors):
+        assert i not in row and sorted(row) == [j for j in range(n) if j != i]
+        assert np.all(np.diff(dist[i][row]) >= 0)
+
+    path, visited = [0], {0}
+    while len(path) < n:
+        nearest = min((j for j in range(n) if j not in visited), key=lambda j: dist[path[-1]][j])
+        path.append(nearest)
+        visited.add(nearest)
+    monkeypatch.setattr(alg, "NEIGHBOR_LIST_SIZE", 2)
+    cost, heuristic_path = alg._calculate_heuristic_upper_bound(dist, neighbors)
+    assert heuristic_path == path + [0]
+
+    improved = alg._two_opt(dist, heuristic_path, neighbors)
+    assert improved[0] == improved[-1] == 0 and sorted(improved[:-1]) == list(range(n))
+    assert alg._path_cost(dist, improved) <= cost
+
+
+def test_carga_de_varias_fontes_remove_duplicatas(tmp_path):
+    """ ID repetido, mesmo ponto de outra fonte e linha inválida ficam de fora """
+    df = pd.read_csv(CSV_PATH).drop(columns=['Unnamed: 0'])
+    first = tmp_path / "fonte_a.csv"
+    df.to_csv(first, index=False)
+
+    base = df[df['id'] == 2].iloc[0]
+    extra = pd.DataFrame([
+        df[df['id'] == 3].iloc[0],  # ID já visto
+        base.copy().rename(None),   # mesmo nome, 5 m ao lado, outro ID
+        base.copy().rename(None),   # outro nome no mesmo endereço
+        base.copy().rename(None),   # latitude inválida
+    ]).reset_index(drop=True)
+    extra.loc[1, ['id', 'nome', 'latitude']] = [900, base['nome'].upper(), base['latitude'] + 0.000045]
+    extra.loc[2, ['id', 'nome']] = [901, "Feira ao lado"]
+    extra.loc[3, ['id', 'latitude']] = [902, 200.0]
+    second = tmp_path / "fonte_b.csv"
+    extra.to_csv(second, index=False)
+
+    store, stats = alg.stream_poi_store([str(first), str(second)], chunksize=4)
+    assert (stats["files"], stats["rows_read"]) == (2, len(df) + 4)
+    assert (stats["duplicate_ids"], stats["duplicate_coords"], stats["invalid"]) == (1, 1, 1)
+    assert sorted(store.ids.tolist()) == sorted(df['id'].tolist() + [901])
+
+
+def test_carga_em_streaming_com_bloco_de_texto_todo_vazio(tmp_path):
+    """ Um bloco com a coluna de texto toda vazia chega como float: continua texto ausente """
+    df = pd.read_csv(CSV_PATH).drop(columns=['Unnamed: 0'])
+    df.loc[3, 'horario_abertura'] = np.nan
+    df.loc[10:19, 'horario_abertura'] = np.nan
+    csv_file = tmp_path / "pontos.csv"
+    df.to_csv(csv_file, index=False)
+
+    store, _ = alg.stream_poi_store(str(csv_file), chunksize=10)
+    values = store.column('horario_abertura').tolist()
+    assert values == [None if pd.isna(v) else v for v in df['horario_abertura']]
+    assert 'nan' not in values
+    assert store.to_frame()['horario_abertura'].isna().sum() == 11
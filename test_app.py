@@ -0,0 +1,42 @@
+# Este arquivo deve ser salvo como: test_app.py
+
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+
+PAGE_TSP = "🚚 Otimizador de Rota (TSP)"
+VALIDATION = "⏱️ Validação (B&B vs PuLP)"
+
+
+def _optimize(at):
+    at.sidebar.button[0].click().run()
+    assert not at.exception
+    return [subheader.value for subheader in at.subheader], [caption.value for caption in at.caption]
+
+
+def test_tsp_so_reaproveita_rota_com_mudanca_na_selecao(monkeypatch):
+    """ Mesma seleção (ou resposta do atlas) roda o portfólio e mostra a validação """
+    monkeypatch.chdir(ROOT)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300).run()
+    at.sidebar.radio[0].set_value(PAGE_TSP).run()
+    atlas = at.sidebar.checkbox(key="tsp_atlas")
+
+    if atlas.value:
+        subheaders, _ = _optimize(at)
+        assert "📚 Atlas de Rotas Ótimas" in subheaders
+        at.sidebar.checkbox(key="tsp_atlas").uncheck().run()
+    subheaders, captions = _optimize(at)
+    assert VALIDATION in subheaders
+    assert not any(caption.startswith("♻️") for caption in captions)
+
+    subheaders, _ = _optimize(at)
+    assert VALIDATION in subheaders
+
+    multiselect = at.sidebar.multiselect[0]
+    extra = next(name for name in multiselect.options if name not in multiselect.value)
+    multiselect.set_value(list(multiselect.value) + [extra]).run()
+    subheaders, captions = _optimize(at)
+    assert VALIDATION not in subheaders
+    assert any("(+1 / -0 pontos)" in caption for caption in captions)
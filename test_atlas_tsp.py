@@ -0,0 +1,78 @@
+# Este arquivo deve ser salvo como: test_atlas_tsp.py
+
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+import algoritmos as alg
+import atlas_tsp
+from conftest import mutate_store
+
+
+def test_atlas_acima_do_limite_nao_e_construido(make_store, tmp_path):
+    """ Catálogo grande demais: sem atlas (e sem alocar 2^m linhas) """
+    store = make_store(atlas_tsp.MAX_ATLAS_POINTS + 15)
+    atlas = atlas_tsp.load_or_build_atlas(store, atlas_dir=str(tmp_path), fingerprint="fp")
+    assert atlas is None
+    assert not (tmp_path / 'meta.json').exists()
+    assert atlas_tsp.run_tsp_from_atlas(atlas, "x", store.rows(range(4))) is None
+    with pytest.raises(ValueError):
+        atlas_tsp.build_atlas(store, atlas_dir=str(tmp_path), fingerprint="fp")
+
+
+def test_atlas_no_limite_e_permitido():
+    assert atlas_tsp.fits_atlas(atlas_tsp.MAX_ATLAS_POINTS + 1)
+    assert not atlas_tsp.fits_atlas(atlas_tsp.MAX_ATLAS_POINTS + 2)
+
+
+def test_atlas_confere_com_forca_bruta(make_store, tmp_path):
+    """ Custos do atlas = melhor permutação, para todas as seleções pequenas """
+    store = make_store(8, seed=3)
+    atlas = atlas_tsp.load_or_build_atlas(store, atlas_dir=str(tmp_path), fingerprint="fp")
+    dist = np.array(alg.calculate_distance_matrix(store.rows()))
+    for size in (2, 3, 4):
+        for subset in itertools.combinations(range(1, 8), size):
+            tour_ids, cost = atlas.lookup([int(store.ids[row]) for row in subset])
+            best = min(
+                dist[0, p[0]] + sum(dist[a, b] for a, b in zip(p, p[1:])) + dist[p[-1], 0]
+                for p in itertools.permutations(subset)
+            )
+            assert cost == pytest.approx(best)
+            assert tour_ids[0] == tour_ids[-1] == 1
+
+
+def test_atlas_incremental_confere_com_rebuild(make_store, tmp_path):
+    """ Rebuild remapeado (pontos novos/removidos/movidos) = atlas construído do zero """
+    for seed in range(4):
+        old = make_store(12, seed=seed)
+        new = mutate_store(old, seed)
+        incremental_dir, full_dir = str(tmp_path / f"inc{seed}"), str(tmp_path / f"full{seed}")
+        atlas_tsp.build_atlas(old, atlas_dir=incremental_dir, fingerprint="a")
+        info = atlas_tsp.build_atlas(new, atlas_dir=incremental_dir, fingerprint="b")
+        full_info = atlas_tsp.build_atlas(new, atlas_dir=full_dir, fingerprint="b")
+        assert 0 < info["subsets_solved"] < full_info["subsets_solved"]
+
+        atlas, expected = atlas_tsp.TSPAtlas(incremental_dir), atlas_tsp.TSPAtlas(full_dir)
+        assert atlas.node_ids == expected.node_ids
+        np.testing.assert_allclose(atlas.costs, expected.costs, equal_nan=True)
+        # Distâncias simétricas: o tour e o seu reverso empatam (o dp reaproveitado é float32)
+        for tour, expected_tour in zip(atlas.tours, expected.tours):
+            tour, expected_tour = tour[tour >= 0].tolist(), expected_tour[expected_tour >= 0].tolist()
+            assert tour in (expected_tour, expected_tour[::-1])
+
+
+def test_atlas_rebuild_troca_a_versao_inteira(make_store, tmp_path):
+    """ Rebuild grava arquivos novos e troca o meta.json; o atlas aberto continua válido """
+    atlas_tsp.build_atlas(make_store(6), atlas_dir=str(tmp_path), fingerprint="a")
+    old = atlas_tsp.TSPAtlas(str(tmp_path))
+    old_cost = float(old.costs[0b11])
+    atlas_tsp.build_atlas(make_store(7, seed=1), atlas_dir=str(tmp_path), fingerprint="b")
+
+    atlas = atlas_tsp.TSPAtlas(str(tmp_path))
+    assert atlas.fingerprint == "b" and len(atlas.node_ids) == 7
+    assert float(old.costs[0b11]) == old_cost
+    meta = json.loads((tmp_path / 'meta.json').read_text(encoding='utf-8'))
+    expected = sorted(list(meta['files'].values()) + ['meta.json'])
+    assert sorted(p.name for p in tmp_path.iterdir()) == expected
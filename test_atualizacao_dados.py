@@ -0,0 +1,51 @@
+# Este arquivo deve ser salvo como: test_atualizacao_dados.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import algoritmos as alg
+import atualizacao_dados
+from conftest import CSV_PATH, interrupted_save
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "pontos.csv"
+    pd.read_csv(CSV_PATH).to_csv(path, index=False)
+    return path
+
+
+def test_diff_e_matriz_incremental(csv_file, tmp_path):
+    """ Só os pontos novos/movidos são recalculados, e a matriz fica igual à do zero """
+    snapshot = str(tmp_path / "snapshot.npz")
+    _, _, _, diff = atualizacao_dados.load_with_diff(str(csv_file), snapshot)
+    assert diff["full"]
+
+    df = pd.read_csv(csv_file)
+    df.loc[df['id'] == 2, 'latitude'] += 0.01
+    df.loc[df['id'] == 4, 'custo_entrada'] += 5
+    new_row = df[df['id'] == 5].assign(id=999, nome="Ponto Novo", longitude=-49.30)
+    df = pd.concat([df[df['id'] != 3], new_row], ignore_index=True)
+    df.to_csv(csv_file, index=False)
+
+    _, store, dist_matrix, diff = atualizacao_dados.load_with_diff(str(csv_file), snapshot)
+    assert not diff["full"]
+    assert (diff["added"], diff["removed"], diff["moved"], diff["edited"]) == ([999], [3], [2], [4])
+    np.testing.assert_allclose(dist_matrix, alg.calculate_distance_matrix(store.rows()))
+
+
+def test_snapshot_com_falha_na_gravacao_mantem_o_anterior(csv_file, tmp_path, monkeypatch):
+    """ Gravação interrompida: o snapshot anterior continua inteiro e sem temporários """
+    snapshot = tmp_path / "snapshot.npz"
+    atualizacao_dados.load_with_diff(str(csv_file), str(snapshot))
+    before = snapshot.read_bytes()
+
+    monkeypatch.setattr(np, "savez", interrupted_save)
+    df = pd.read_csv(csv_file)
+    df.loc[df['id'] == 2, 'latitude'] += 0.01
+    df.to_csv(csv_file, index=False)
+    assert atualizacao_dados.load_with_diff(str(csv_file), str(snapshot))[0] is None
+
+    assert snapshot.read_bytes() == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["pontos.csv", "snapshot.npz"]
@@ -0,0 +1,85 @@
+# Este arquivo deve ser salvo como: test_pareto_orcamento.py
+
+import numpy as np
+import pytest
+
+import algoritmos as alg
+import atualizacao_dados
+import pareto_orcamento
+from conftest import interrupted_save, mutate_store
+
+
+def _solve(store, start_node_id, max_time_min, max_cost):
+    dist = np.array(alg.calculate_distance_matrix(store.rows()))
+    return alg.solve_budget_route_heuristic(store.rows(), dist, store.id_to_row, max_time_min=max_time_min,
+                                            max_cost=max_cost, start_node_id=start_node_id)
+
+
+def test_tabela_aceita_ids_grandes(make_store):
+    """ IDs acima de 32767 (antes guardados em int16) não estouram """
+    ids = [70_000 + k for k in range(10)]
+    store = make_store(10, ids=ids)
+    dist = np.array(alg.calculate_distance_matrix(store.rows()))
+    table = pareto_orcamento.build_pareto_table(store.rows(), dist, store.id_to_row, start_node_id=ids[0], max_workers=1)
+
+    found = pareto_orcamento.lookup(table, 8 * 60, 50)
+    assert found is not None
+    route_ids = found[0]
+    assert route_ids and set(route_ids) <= set(ids)
+    route, _, _ = _solve(store, ids[0], 8 * 60, 50)
+    assert route_ids == [node['id'] for node in route]
+
+
+def test_tabela_confere_com_a_heuristica(make_store):
+    """ Cada célula da grade = rota da heurística gulosa para aquele orçamento """
+    store = make_store(8, seed=5)
+    dist = np.array(alg.calculate_distance_matrix(store.rows()))
+    table = pareto_orcamento.build_pareto_table(store.rows(), dist, store.id_to_row, max_workers=1)
+    for hours in (2.0, 4.5, 10.0):
+        for cost in (0, 25, 100):
+            route, _, _ = _solve(store, 1, hours * 60, cost)
+            assert pareto_orcamento.lookup(table, hours * 60, cost)[0] == [node['id'] for node in route]
+
+
+def _table_cells(table):
+    routes = [[int(node_id) for node_id in route if node_id >= 0] for route in table["routes"].reshape(-1, table["routes"].shape[-1])]
+    return routes, table["popularity"], table["time_used"], table["cost_used"], table["frontier_cells"]
+
+
+def test_atualizacao_seletiva_confere_com_rebuild(make_store):
+    """ Depois de pontos novos/removidos/movidos/editados: tabela atualizada = tabela do zero """
+    kept = 0
+    for seed in range(6):
+        old = make_store(14, seed=seed)
+        new = mutate_store(old, seed)
+        old_columns = {key: old.column(key) for key in atualizacao_dados.COORD_COLUMNS + atualizacao_dados.SOLVER_COLUMNS}
+        diff = atualizacao_dados.diff_datasets(old.ids, old_columns, new)
+        old_table = pareto_orcamento.build_pareto_table(old.rows(), np.array(alg.calculate_distance_matrix(old.rows())),
+                                                        old.id_to_row, max_workers=1)
+        dist = np.array(alg.calculate_distance_matrix(new.rows()))
+
+        updated, recomputed = pareto_orcamento.update_pareto_table(old_table, new.rows(), dist, new.id_to_row, diff)
+        rebuilt = pareto_orcamento.build_pareto_table(new.rows(), dist, new.id_to_row, max_workers=1)
+        routes, *arrays = _table_cells(updated)
+        expected_routes, *expected_arrays = _table_cells(rebuilt)
+        assert routes == expected_routes
+        for array, expected in zip(arrays, expected_arrays):
+            np.testing.assert_allclose(array, expected)
+        kept += rebuilt["popularity"].size - recomputed
+    assert kept > 0 # O caminho seletivo foi exercitado (nem tudo foi refeito)
+
+
+def test_tabela_com_falha_na_gravacao_nao_deixa_arquivo(make_store, tmp_path, monkeypatch):
+    """ A tabela só aparece no cache inteira (temporário + os.replace) """
+    monkeypatch.setattr(pareto_orcamento, "CACHE_DIR", str(tmp_path))
+    store = make_store(8)
+    dist = np.array(alg.calculate_distance_matrix(store.rows()))
+    diff = {"fingerprint": "a", "old_fingerprint": None}
+    pareto_orcamento.load_or_build_pareto_table(store.rows(), dist, store.id_to_row, max_workers=1, diff=diff)
+    saved = sorted(p.name for p in tmp_path.iterdir())
+
+    monkeypatch.setattr(np, "savez_compressed", interrupted_save)
+    with pytest.raises(OSError):
+        pareto_orcamento.load_or_build_pareto_table(store.rows(), dist, store.id_to_row, max_workers=1,
+                                                    diff={"fingerprint": "b", "old_fingerprint": None})
+    assert sorted(p.name for p in tmp_path.iterdir()) == saved
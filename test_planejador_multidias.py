@@ -0,0 +1,64 @@
+# Este arquivo deve ser salvo como: test_planejador_multidias.py
+
+import itertools
+
+import numpy as np
+import pytest
+
+import algoritmos as alg
+import planejador_multidias
+
+
+def _best_round_trip(dist, members):
+    if not members:
+        return 0.0
+    return min(
+        dist[0, p[0]] + sum(dist[a, b] for a, b in zip(p, p[1:])) + dist[p[-1], 0]
+        for p in itertools.permutations(members)
+    )
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_roteiro_respeita_limites_e_cobre_os_pontos(make_store, max_workers):
+    """ Cada ponto em exatamente um dia (ou não alocado), limites diários respeitados e dias ótimos """
+    store = make_store(13, seed=7)
+    nodes = store.rows()
+    plan = planejador_multidias.plan_multi_day_itinerary(nodes[1:], nodes[0], num_days=3, max_time_min_per_day=6 * 60,
+                                                         max_cost_per_day=40, max_workers=max_workers)
+
+    visited = [node['id'] for day in plan["days"] for node in day["route"][1:-1]]
+    unassigned = [node['id'] for node in plan["unassigned"]]
+    assert sorted(visited + unassigned) == list(range(2, 14))
+    assert len(set(visited)) == len(visited)
+
+    for day in plan["days"]:
+        assert day["time_min"] <= 6 * 60 + 1e-6
+        assert day["cost"] <= 40
+        route = day["route"]
+        assert route[0]['id'] == route[-1]['id'] == 1
+        day_nodes = [route[0]] + route[1:-1]
+        dist = np.array(alg.calculate_distance_matrix(day_nodes))
+        assert day["distance_km"] == pytest.approx(_best_round_trip(dist, range(1, len(day_nodes))))
+
+
+def test_roteiro_com_zero_dias_e_recusado(make_store):
+    nodes = make_store(4).rows()
+    assert planejador_multidias.plan_multi_day_itinerary(nodes[1:], nodes[0], 0, 480, 50) is None
+
+
+def test_ponto_que_nao_cabe_em_dia_algum_nao_fecha_os_dias(make_store):
+    """ Um ponto caro demais fica de fora sem mudar a divisão dos demais """
+    nodes = [row.to_dict() for row in make_store(13, seed=2).rows()]
+    for node in nodes:
+        node['custo_entrada'] = 0
+    expensive = 6
+    nodes[expensive]['custo_entrada'] = 100
+    dist = np.array(alg.calculate_distance_matrix(nodes))
+    days, unassigned = planejador_multidias.sweep_partition(dist, nodes, 3, 6 * 60, 50)
+    assert expensive in unassigned
+
+    others = [i for i in range(len(nodes)) if i != expensive]
+    sub_dist = dist[np.ix_(others, others)]
+    sub_days, sub_unassigned = planejador_multidias.sweep_partition(sub_dist, [nodes[i] for i in others], 3, 6 * 60, 50)
+    assert days == [[others[k] for k in day] for day in sub_days]
+    assert sorted(unassigned) == sorted([expensive] + [others[k] for k in sub_unassigned])
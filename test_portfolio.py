@@ -0,0 +1,56 @@
+# Este arquivo deve ser salvo como: test_portfolio.py
+
+import os
+import subprocess
+import time
+
+import portfolio
+
+
+def _fast_worker(experiment_name, nodes_data, incumbent_path, previous_path_ids, shared_bound, config):
+    # Só vence depois que o perdedor já abriu o seu subprocesso
+    while not os.path.exists(config):
+        time.sleep(0.01)
+    return {"cost": 1.0, "path": [0, 1, 0], "optimal": True}
+
+
+def _slow_worker(experiment_name, nodes_data, incumbent_path, previous_path_ids, shared_bound, config):
+    # Como o PuLP com o CBC: o trabalho pesado roda em um subprocesso
+    child = subprocess.Popen(["sleep", "60"])
+    with open(config, "w") as f:
+        f.write(str(child.pid))
+    child.wait()
+    return None
+
+
+def _is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_modo_first_cancela_o_subprocesso_do_perdedor(make_store, tmp_path, monkeypatch):
+    """ O perdedor é cancelado com o seu subprocesso (nada de CBC órfão) """
+    monkeypatch.setitem(portfolio.SOLVERS, "rapido", _fast_worker)
+    monkeypatch.setitem(portfolio.SOLVERS, "lento", _slow_worker)
+    pid_file = tmp_path / "pid"
+    nodes = make_store(4).rows()
+
+    result = portfolio.run_tsp_portfolio("x", nodes, solvers=("lento", "rapido"), mode=portfolio.MODE_FIRST,
+                                         solver_configs={"lento": str(pid_file), "rapido": str(pid_file)})
+    assert result["winner"] == "rapido"
+
+    pid = int(pid_file.read_text())
+    deadline = time.time() + 5
+    while _is_running(pid) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not _is_running(pid)
+
+
+def test_portfolio_bnb_e_pulp_concordam(make_store):
+    nodes = make_store(6, seed=2).rows()
+    result = portfolio.run_tsp_portfolio("x", nodes, mode=portfolio.MODE_ALL)
+    costs = [result["results"][name]["cost"] for name in ("bnb", "pulp")]
+    assert abs(costs[0] - costs[1]) < 1e-6
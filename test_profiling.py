@@ -0,0 +1,64 @@
+# Este arquivo deve ser salvo como: test_profiling.py
+
+import json
+
+import profiling
+
+
+class _FakeLogger:
+    def __init__(self):
+        self.lines = []
+
+    def info(self, message):
+        self.lines.append(message)
+
+
+def _memo_cache(func):
+    """Imita st.cache_data: memoiza por argumentos e expõe .clear()."""
+    memo = {}
+
+    def cached(*args):
+        if args not in memo:
+            memo[args] = func(*args)
+        return memo[args]
+    cached.clear = memo.clear
+    return cached
+
+
+def test_contador_de_cache_separa_chamadas_de_misses():
+    @profiling.counted_cache(_memo_cache, name="teste_contador")
+    def square(x):
+        return x * x
+
+    assert [square(2), square(2), square(3)] == [4, 4, 9]
+    square.clear()
+    square(2)
+    stats = profiling.cache_stats()["teste_contador"]
+    assert (stats["chamadas"], stats["misses"]) == (4, 3)
+    assert stats["hit_rate"] == 0.25
+
+
+def test_rerun_registra_secoes_aninhadas(monkeypatch):
+    logger = _FakeLogger()
+    monkeypatch.setattr(profiling, "_get_logger", lambda: logger)
+
+    assert profiling.start_rerun("1", {"pagina": "TSP"}) is not None
+    assert profiling.is_enabled()
+    with profiling.section("externa", "página"):
+        with profiling.section("interna", "solver"):
+            sum(range(1000))
+    profile = profiling.finish_rerun({"sessao": 7})
+
+    assert not profiling.is_enabled()
+    assert [(r["secao"], r["nivel"]) for r in profile.records] == [("externa", 0), ("interna", 1)]
+    outer, inner = profile.records
+    assert outer["tempo_ms"] >= inner["tempo_ms"] >= 0
+    entry = json.loads(logger.lines[-1])
+    assert entry["contexto"] == {"pagina": "TSP", "sessao": 7} and entry["modo"] == "time"
+
+
+def test_profiling_desligado_nao_mede_nada(monkeypatch):
+    monkeypatch.delenv(profiling.ENV_VAR, raising=False)
+    assert profiling.start_rerun(None) is None
+    assert profiling.section("x") is profiling._NULL_SECTION
+    assert profiling.finish_rerun() is None
@@ -0,0 +1,22 @@
+# Este arquivo deve ser salvo como: test_solver_pulp.py
+
+import pulp
+import pytest
+
+import algoritmos as alg
+import solver_pulp
+
+
+def test_status_distingue_otima_de_viavel():
+    """ Parado por limite com solução só viável: não pode aparecer como ótima """
+    assert solver_pulp.solution_status(pulp.LpStatusOptimal, pulp.LpSolutionOptimal) == (True, "Ótima")
+    assert solver_pulp.solution_status(pulp.LpStatusOptimal, pulp.LpSolutionIntegerFeasible) == (False, "Viável (limite atingido)")
+    assert solver_pulp.solution_status(pulp.LpStatusNotSolved, pulp.LpSolutionIntegerFeasible)[0] is False
+
+
+def test_pulp_confere_com_o_bnb(make_store):
+    nodes = make_store(6, seed=4).rows()
+    config = solver_pulp.SolverConfig(backend="CBC", threads=1)
+    result = solver_pulp.solve_tsp_with_pulp("x", nodes, config=config)
+    assert result['optimal'] and result['solver_status'] == "Ótima"
+    assert result['cost'] == pytest.approx(alg.run_tsp_experiment("x", nodes)['cost'])
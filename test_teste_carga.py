@@ -0,0 +1,25 @@
+# Este arquivo deve ser salvo como: test_teste_carga.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import teste_carga
+
+
+def test_resumo_separa_render_da_fila():
+    """ A espera pelo lock do AppTest não se mistura ao tempo do rerun """
+    records = pd.DataFrame([
+        {"interacao": "orcamento", "latencia_ms": 300.0, "render_ms": 100.0, "fila_ms": 200.0, "erro": None},
+        {"interacao": "orcamento", "latencia_ms": 120.0, "render_ms": 120.0, "fila_ms": 0.0, "erro": None},
+        {"interacao": "tsp_otimizar", "latencia_ms": 900.0, "render_ms": 50.0, "fila_ms": 850.0, "erro": "Timeout"},
+        {"interacao": "roteiro", "latencia_ms": np.nan, "render_ms": np.nan, "fila_ms": np.nan, "erro": "KeyError"},
+    ])
+    summary = teste_carga.summarize_latencies(records).set_index("interacao")
+
+    assert summary.loc["orcamento", "p50_ms"] == pytest.approx(210.0)
+    assert summary.loc["orcamento", "render_p50_ms"] == pytest.approx(110.0)
+    assert summary.loc["orcamento", "fila_p50_ms"] == pytest.approx(100.0)
+    assert summary.loc["todas", "n"] == 4 and summary.loc["todas", "erros"] == 2
+    assert summary.loc["todas", "render_p99_ms"] <= 120.0
+    assert np.isnan(summary.loc["tsp_otimizar", "render_p50_ms"])
@@ -0,0 +1,407 @@
+# Este arquivo deve ser salvo como: teste_carga.py
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource # Só em Unix; sem ele o uso de memória não é informado
+except ImportError:
+    resource = None
+
+# =============================================================================
+# TESTE DE CARGA COM SESSÕES SIMULTÂNEAS
+# =============================================================================
+# Cada worker é um processo, como uma réplica do servidor Streamlit: as
+# sessões dele compartilham os caches (st.cache_data / st.cache_resource).
+# Dentro de cada worker, N sessões rodam ao mesmo tempo (uma thread cada),
+# cada uma com o seu AppTest (session_state próprio), seguindo um roteiro
+# aleatório de interações de um usuário:
+#   * trocar de página
+#   * Rota por Orçamento: mover os sliders e calcular
+#   * TSP: mudar a seleção de pontos e otimizar a rota
+#   * Roteiro de vários dias: planejar
+# A latência de cada interação é o rerun completo do app (AppTest.run).
+#
+# Limitação: o AppTest instala um Runtime global do processo a cada rerun,
+# então os reruns de um mesmo worker são feitos um de cada vez
+# (_RERUN_LOCK). Um servidor real roda os reruns em paralelo (disputando só
+# o GIL); aqui, com várias sessões por worker, a latência total é quase toda
+# espera pelo lock. Por isso cada interação registra à parte:
+#   * render_ms -> o rerun em si (o que o usuário esperaria no servidor)
+#   * fila_ms   -> a espera pelo lock, artefato do harness
+# e o gate de regressão (--max-p99-ms) usa o p99 do render.
+# Com --sessao-por-processo cada sessão roda em um processo próprio: não há
+# fila, as sessões disputam a CPU de verdade, mas os caches deixam de ser
+# compartilhados entre elas (use --warmup para aquecer cada processo).
+# O relatório traz os percentis por interação, CPU e pico de memória por
+# worker e a taxa de acerto dos caches (profiling.cache_stats).
+#
+# Uso: python teste_carga.py --workers 2 --sessions 8 --steps 20
+#      python teste_carga.py --workers 2 --sessions 8 --steps 20 --sessao-por-processo
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(APP_DIR, 'app.py')
+RERUN_TIMEOUT_S = 300
+PERCENTILES = (50, 90, 99)
+
+PAGE_EDA = "🏠 Análise Exploratória (EDA)"
+PAGE_BUDGET = "💰 Rota por Orçamento (Heurística)"
+PAGE_TSP = "🚚 Otimizador de Rota (TSP)"
+PAGE_MULTI_DAY = "📅 Roteiro de Vários Dias"
+PAGE_SENSITIVITY = "🔬 Análise de Sensibilidade"
+PAGES = [PAGE_EDA, PAGE_BUDGET, PAGE_TSP, PAGE_MULTI_DAY, PAGE_SENSITIVITY]
+
+# Interações do roteiro e peso relativo de cada uma
+SESSION_MIX = {
+    "trocar_pagina": 3,
+    "orcamento": 3,
+    "tsp_selecao": 2,
+    "tsp_otimizar": 3,
+    "multidias": 1,
+}
+
+
+# =============================================================================
+# SESSÃO SIMULADA
+# =============================================================================
+
+class _FairLock:
+    """Lock por ordem de chegada (o threading.Lock deixa uma sessão monopolizar)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+    def __enter__(self):
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._cond.wait_for(lambda: self._serving == ticket)
+
+    def __exit__(self, *exc_info):
+        with self._cond:
+            self._serving += 1
+            self._cond.notify_all()
+
+
+_RERUN_LOCK = _FairLock()
+
+
+class _Session:
+    """Uma sessão de usuário (AppTest) que registra a latência de cada rerun."""
+
+    def __init__(self, session_id, rng, use_atlas):
+        self.session_id = session_id
+        self.rng = rng
+        self.use_atlas = use_atlas
+        self.records = []
+        self.at = None
+        self.page = PAGE_EDA
+
+    def _timed(self, interaction, action):
+        start = time.perf_counter()
+        error = None
+        with _RERUN_LOCK:
+            queued = time.perf_counter()
+            try:
+                action()
+                if self.at.exception:
+                    error = str(self.at.exception[0].value)
+            except Exception as e: # Timeout do rerun, widget não encontrado, ...
+                error = f"{type(e).__name__}: {e}"
+        end = time.perf_counter()
+        self.records.append({
+            "sessao": self.session_id,
+            "interacao": interaction,
+            "latencia_ms": (end - start) * 1000,
+            "render_ms": (end - queued) * 1000,
+            "fila_ms": (queued - start) * 1000,
+            "erro": error,
+        })
+
+    def open(self):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(APP_FILE, default_timeout=RERUN_TIMEOUT_S)
+        self._timed("abrir_app", self.at.run)
+
+    def goto(self, page):
+        if self.page != page:
+            self.page = page
+            self._timed("trocar_pagina", lambda: self.at.sidebar.radio[0].set_value(page).run())
+
+    def switch_page(self):
+        self.goto(self.rng.choice([page for page in PAGES if page != self.page]))
+
+    def budget(self):
+        self.goto(PAGE_BUDGET)
+        hours, cost = self.at.sidebar.slider[0], self.at.sidebar.slider[1]
+        hours.set_value(self.rng.choice(np.arange(1.0, 24.5, 0.5).tolist()))
+        cost.set_value(self.rng.randrange(0, 205, 5))
+        self._timed("orcamento", lambda: self.at.sidebar.button[0].click().run())
+
+    def tsp_selection(self):
+        self.goto(PAGE_TSP)
+        multiselect = self.at.sidebar.multiselect[0]
+        selection = self.rng.sample(list(multiselect.options), self.rng.randint(2, 9))
+        self._timed("tsp_selecao", lambda: multiselect.set_value(selection).run())
+
+    def tsp_optimize(self):
+        self.goto(PAGE_TSP)
+        atlas = self.at.sidebar.checkbox(key="tsp_atlas")
+        if atlas.value != self.use_atlas:
+            atlas.set_value(self.use_atlas)
+        self._timed("tsp_otimizar", lambda: self.at.sidebar.button[0].click().run())
+
+    def multi_day(self):
+        self.goto(PAGE_MULTI_DAY)
+        self.at.sidebar.slider[0].set_value(self.rng.randint(2, 5))
+        self._timed("multidias", lambda: self.at.sidebar.button[0].click().run())
+
+    def run(self, steps, think_time_s):
+        actions = {
+            "trocar_pagina": self.switch_page,
+            "orcamento": self.budget,
+            "tsp_selecao": self.tsp_selection,
+            "tsp_otimizar": self.tsp_optimize,
+            "multidias": self.multi_day,
+        }
+        self.open()
+        names, weights = list(SESSION_MIX), list(SESSION_MIX.values())
+        for _ in range(steps):
+            if think_time_s:
+                time.sleep(self.rng.uniform(0, think_time_s))
+            try:
+                actions[self.rng.choices(names, weights)[0]]()
+            except Exception as e: # Falha ao preparar os widgets (o rerun anterior falhou)
+                self.records.append({"sessao": self.session_id, "interacao": "roteiro", "latencia_ms": np.nan,
+                                     "render_ms": np.nan, "fila_ms": np.nan, "erro": f"{type(e).__name__}: {e}"})
+        return self.records
+
+
+# =============================================================================
+# WORKER (UM PROCESSO)
+# =============================================================================
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def _children_cpu_s():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _cache_delta(before, after):
+    delta = {}
+    for name, counts in after.items():
+        calls = counts["chamadas"] - before.get(name, {}).get("chamadas", 0)
+        misses = counts["misses"] - before.get(name, {}).get("misses", 0)
+        delta[name] = {"chamadas": calls, "misses": misses}
+    return delta
+
+
+def run_worker(worker_id, sessions, steps, seed, think_time_s=0.0, use_atlas=True, warmup=False):
+    """
+    Roda 'sessions' sessões simultâneas neste processo. Retorna as latências
+    registradas e as medições do worker (CPU, memória e caches).
+    """
+    os.chdir(APP_DIR) # O app lê o CSV pelo caminho relativo
+    sys.path.insert(0, APP_DIR)
+    # Sem servidor, o Streamlit avisa a cada sessão que está em "bare mode"
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    import profiling
+
+    if warmup:
+        # Uma sessão fora da medição carrega dados, tabela de orçamento e atlas
+        warm = _Session(-1, random.Random(seed), use_atlas)
+        warm.open()
+        warm.budget()
+        warm.tsp_optimize()
+    cache_before = profiling.cache_stats()
+
+    cpu_start, children_start = time.process_time(), _children_cpu_s()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        futures = [
+            executor.submit(_Session(session_id, random.Random(seed * 10_000 + worker_id * 1_000 + session_id),
+                                     use_atlas).run, steps, think_time_s)
+            for session_id in range(sessions)
+        ]
+        records = [record for future in futures for record in future.result()]
+    wall_s = time.perf_counter() - wall_start
+    cpu_s = time.process_time() - cpu_start
+    children_s = _children_cpu_s() - children_start
+
+    for record in records:
+        record["worker"] = worker_id
+    return {
+        "records": records,
+        "worker": {
+            "worker": worker_id,
+            "sessoes": sessions,
+            "tempo_s": wall_s,
+            "cpu_s": cpu_s,
+            "cpu_filhos_s": children_s,
+            "cpu_pct": 100 * (cpu_s + children_s) / wall_s if wall_s else 0.0,
+            "pico_rss_mb": _peak_rss_mb(),
+        },
+        "caches": _cache_delta(cache_before, profiling.cache_stats()),
+    }
+
+
+# =============================================================================
+# RELATÓRIO
+# =============================================================================
+
+def summarize_latencies(df_records):
+    """
+    Percentis (ms) por interação, mais a linha 'todas': latência total
+    (p50/p90/p99/max), só o rerun (render_*) e só a espera pelo lock (fila_*).
+    """
+    rows = []
+    groups = list(df_records.groupby("interacao")) + [("todas", df_records)]
+    for interaction, group in groups:
+        ok = group[group["erro"].isna()]
+        latency, render, queue = (ok[key].dropna() for key in ("latencia_ms", "render_ms", "fila_ms"))
+        row = {"interacao": interaction, "n": len(group), "erros": int(group["erro"].notna().sum())}
+        for p in PERCENTILES:
+            row[f"p{p}_ms"] = float(np.percentile(latency, p)) if len(latency) else np.nan
+        row["max_ms"] = float(latency.max()) if len(latency) else np.nan
+        for p in (50, 99):
+            row[f"render_p{p}_ms"] = float(np.percentile(render, p)) if len(render) else np.nan
+        for p in (50, 99):
+            row[f"fila_p{p}_ms"] = float(np.percentile(queue, p)) if len(queue) else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def summarize_caches(worker_results):
+    """Chamadas, misses e taxa de acerto de cada cache, somando os workers."""
+    totals = {}
+    for result in worker_results:
+        for name, counts in result["caches"].items():
+            total = totals.setdefault(name, {"chamadas": 0, "misses": 0})
+            total["chamadas"] += counts["chamadas"]
+            total["misses"] += counts["misses"]
+    rows = [{"cache": name, **counts,
+             "hit_rate": 1 - counts["misses"] / counts["chamadas"] if counts["chamadas"] else np.nan}
+            for name, counts in sorted(totals.items())]
+    return pd.DataFrame(rows, columns=["cache", "chamadas", "misses", "hit_rate"])
+
+
+def run_load_test(workers=1, sessions=4, steps=10, seed=0, think_time_s=0.0, use_atlas=True, warmup=False,
+                  process_per_session=False):
+    """
+    Dispara 'workers' processos com 'sessions' sessões simultâneas cada.
+    Com process_per_session=True, são workers x sessions processos de uma
+    sessão cada (sem a fila do AppTest, sem caches compartilhados).
+    Retorna um dicionário de DataFrames: 'latencias', 'workers', 'caches' e
+    'registros' (uma linha por interação), além de 'tempo_s' e 'vazao'.
+    """
+    if process_per_session:
+        workers, sessions = workers * sessions, 1
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_worker, worker_id, sessions, steps, seed, think_time_s, use_atlas, warmup)
+                   for worker_id in range(workers)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start_time
+
+    df_records = pd.DataFrame([record for result in results for record in result["records"]],
+                              columns=["worker", "sessao", "interacao", "latencia_ms", "render_ms", "fila_ms", "erro"])
+    return {
+        "latencias": summarize_latencies(df_records),
+        "workers": pd.DataFrame([result["worker"] for result in results]),
+        "caches": summarize_caches(results),
+        "registros": df_records,
+        "tempo_s": elapsed,
+        "vazao": len(df_records) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Teste de carga do app com sessões simultâneas (AppTest).",
+        epilog="Limitação: o AppTest não é thread-safe, então as sessões de um mesmo worker fazem os "
+               "reruns uma de cada vez. A latência total inclui essa fila (fila_ms, artefato do harness); "
+               "render_ms é só o rerun. Use --sessao-por-processo para sessões realmente simultâneas.")
+    parser.add_argument("--workers", type=int, default=1, help="Processos (réplicas do servidor).")
+    parser.add_argument("--sessions", type=int, default=4, help="Sessões simultâneas por worker.")
+    parser.add_argument("--steps", type=int, default=10, help="Interações por sessão (além de abrir o app).")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos roteiros aleatórios.")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Pausa máxima (s) entre interações; sorteada de 0 a este valor.")
+    parser.add_argument("--no-atlas", action="store_true", help="Otimiza o TSP com os solvers, sem o atlas.")
+    parser.add_argument("--warmup", action="store_true", help="Aquece os caches de cada worker antes de medir.")
+    parser.add_argument("--sessao-por-processo", action="store_true",
+                        help="Cada sessão em um processo próprio: sem a fila do AppTest, mas sem caches "
+                             "compartilhados entre as sessões.")
+    parser.add_argument("--json", help="Grava o resumo neste arquivo JSON (para comparar execuções).")
+    parser.add_argument("--max-p99-ms", type=float,
+                        help="Sai com código 1 se o p99 do render (sem a fila) de alguma interação passar deste valor.")
+    args = parser.parse_args()
+
+    report = run_load_test(args.workers, args.sessions, args.steps, args.seed, args.think_time,
+                           use_atlas=not args.no_atlas, warmup=args.warmup,
+                           process_per_session=args.sessao_por_processo)
+
+    pd.set_option("display.width", 160)
+    n_records = len(report["registros"])
+    print(f"\n{args.workers} worker(s) x {args.sessions} sessões: {n_records} interações "
+          f"em {report['tempo_s']:.1f} s ({report['vazao']:.2f} interações/s)")
+    print("\nLatência por interação (ms):")
+    print(report["latencias"].to_string(index=False, float_format="%.1f"))
+    if args.sessao_por_processo:
+        print("Uma sessão por processo: sem fila; caches não compartilhados entre as sessões.")
+    else:
+        print("Obs.: as sessões de um worker fazem os reruns uma de cada vez (AppTest não é thread-safe). "
+              "p50..max incluem essa fila (fila_*); render_* é só o rerun, o que um servidor real mediria. "
+              "Use --sessao-por-processo para sessões realmente simultâneas.")
+    print("\nWorkers:")
+    print(report["workers"].to_string(index=False, float_format="%.1f"))
+    print("\nCaches:")
+    print(report["caches"].to_string(index=False, float_format="%.3f"))
+
+    errors = report["registros"].dropna(subset=["erro"])
+    if not errors.empty:
+        print(f"\n{len(errors)} interação(ões) com erro. Primeiros erros:")
+        for _, row in errors.head(5).iterrows():
+            print(f"  [worker {row['worker']}, sessão {row['sessao']}] {row['interacao']}: {row['erro']}")
+
+    if args.json:
+        summary = {
+            "parametros": vars(args),
+            "tempo_s": report["tempo_s"],
+            "vazao": report["vazao"],
+            "latencias": report["latencias"].to_dict("records"),
+            "workers": report["workers"].to_dict("records"),
+            "caches": report["caches"].to_dict("records"),
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+
+    if args.max_p99_ms is not None:
+        over = report["latencias"][report["latencias"]["render_p99_ms"] > args.max_p99_ms]
+        if not over.empty:
+            print(f"\nRegressão: p99 do render acima de {args.max_p99_ms:.0f} ms em {', '.join(over['interacao'])}.")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()